@@ -7,5 +7,7 @@ This allows us to factor out the package into multiple files while keeping a con
 
 from socialchoice.ballot import *
 from socialchoice.election import *
+from socialchoice.loaders import *
+from socialchoice.parallel import parallel_tally, parallel_tally_csv
 from socialchoice.induction.resolving_incompleteness import IncompletenessResolverFactory
 from socialchoice.induction.resolving_intransitivity import IntransitivityResolverFactory
@@ -1,14 +1,61 @@
+import functools
+import os
 import warnings
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice, repeat
 
 import networkx as nx
-from more_itertools import flatten
+import numpy as np
+from more_itertools import chunked
 
 from socialchoice import util
-from socialchoice.induction.vote_induction import vote_induction
+from socialchoice.ballot_file import (
+    PAIRWISE,
+    VOTER_TRACKING_PAIRWISE,
+    RANKED,
+    read_ballot_file,
+    write_votes,
+    write_rankings,
+)
+from socialchoice.induction.vote_induction import induce_orderings
+from socialchoice.graph import PairwiseGraph
+from socialchoice.tally import PairwiseTally, MatchupView
+from socialchoice.vote_store import VoteStore
+
+DEFAULT_CHUNK_SIZE = 100_000
+"""The number of votes that ballot boxes validate and count at a time while being constructed."""
+DEFAULT_INDUCTION_CHUNK_SIZE = 1_000
+"""The number of voters whose votes each worker resolves into orderings at a time."""
+
+
+def cached_until_ballots_change(method):
+    """Memoizes a ballot box method that takes no arguments. The result is recomputed only after
+    the ballot box's `version` changes, which happens whenever its ballots change.
+    """
+
+    @functools.wraps(method)
+    def memoized_method(self):
+        cache = self.__dict__.setdefault("_cache", {})
+        version, result = cache.get(method.__name__, (None, None))
+        if version != self.version:
+            result = method(self)
+            cache[method.__name__] = (self.version, result)
+        return result
+
+    return memoized_method
 
 
 class BallotBox:
-    """An interface for the features of ballot boxes. """
+    """An interface for the features of ballot boxes.
+
+    Matchups and graphs returned by ballot boxes are cached and shared between callers, so they
+    are read-only: graphs are frozen, and matchups are a read-only mapping. Copy them (for example
+    with `nx.DiGraph.copy`) before modifying them.
+    """
+
+    version = 0
+    """Incremented whenever the ballots in this box change, invalidating any cached results."""
 
     def get_candidates(self) -> set:
         """
@@ -26,6 +73,15 @@ class BallotBox:
          """
         pass
 
+    def get_pairwise_graph(self) -> PairwiseGraph:
+        """
+        The matchup graph and the victory graph, stored as matrices of the wins, losses, and ties
+        between every pair of candidates rather than as networkx graphs. This is what the ranking
+        methods use, as it is much cheaper to build for many candidates. Use
+        `PairwiseGraph.to_networkx` to convert it to a networkx graph.
+        """
+        pass
+
     def get_matchup_graph(self) -> nx.DiGraph:
         """
         A matchup graph is a fully-connected graph, with each out-edge corresponding to a matchup
@@ -40,7 +96,7 @@ class BallotBox:
         """
         pass
 
-    def get_matchups(self) -> dict:
+    def get_matchups(self) -> MatchupView:
         """This matchup shows the number of wins and losses each candidate has against each other.
         The shape of the final dictionary returned is:
 
@@ -93,6 +149,23 @@ class BallotBox:
         :return: all the orderings in this BallotBox.
         """
 
+    def get_weighted_orderings(self):
+        """
+        Like `get_orderings`, but each distinct ordering is only returned once, along with the
+        number of times it appears. Orderings are tuples of frozensets, for example:
+
+        ```
+        >>> RankedChoiceBallotBox([[1, 2], [1, 2], [{1, 2}]]).get_weighted_orderings()
+        [((frozenset({1}), frozenset({2})), 2), ((frozenset({1, 2}),), 1)]
+        ```
+        :return: a list of (ordering, count) pairs, or None if this ballot box does not have
+        complete orderings.
+        """
+        orderings = self.get_orderings()
+        if orderings is None:
+            return None
+        return [(tuple(frozenset(tied) for tied in ordering), 1) for ordering in orderings]
+
     def enable_ordering_based_methods(self, intransitivity_resolver, incompleteness_resolver):
         """If this election has a ballot box that supports pairwise comparisons but
         not ordering based methods, use the given intransitivity and incompleteness
@@ -112,35 +185,204 @@ class BallotBox:
 class PairwiseBallotBox(BallotBox):
     """Stores ballots in pairwise form, as in: ["Alice",  "Bob", "win"]"""
 
-    def __init__(self, votes, candidates=None):
+    def __init__(self, votes, candidates=None, keep_votes=True, chunk_size=DEFAULT_CHUNK_SIZE):
         """
         Creates a new PairwiseBallotBox.
 
-        :param votes: An array of votes, where a vote is any indexable object of length 3.
+        :param votes: An iterable of votes, where a vote is any indexable object of length 3.
         The first two elements are the ids of the two candidates being voted on, and the third is
-        one of "win", "loss", or "tie", indicating the result.
+        one of "win", "loss", or "tie", indicating the result. The votes are consumed once, and
+        validated and counted `chunk_size` at a time, so they can be a generator over more votes
+        than fit in memory.
 
         :param candidates: None, meaning to infer the candidate set from the votes, or a
         collection of the candidates that were being voted on in this election.
 
-        :raises InvalidVoteShapeException: if given any vote with length != 3
+        :param keep_votes: whether to store the votes themselves, rather than only the tallies.
+        Pairwise methods only need the tallies, but `ballots`, `enable_ordering_based_methods`,
+        and `remove_votes` need the votes.
+
+        :param chunk_size: the number of votes to validate and count at a time.
+
+        :raises InvalidBallotDataException: if given any vote with length != 3, or any vote that
+        mentions a candidate not in `candidates`
         """
-        votes = list(votes)
-        self.ballots = self.__ensure_valid_votes(votes)
         self.ordering_ballot_box = None
-        self.candidates = candidates or self.__get_all_candidates_from_votes(self.ballots)
+        self.candidates = candidates or set()
+        self.tally = PairwiseTally(candidates or ())
+        self.__has_fixed_candidates = bool(candidates)
+        self.vote_store = VoteStore(self.tally.ids) if keep_votes else None
+        for chunk in chunked(votes, chunk_size):
+            self.add_votes(chunk)
+
+    @classmethod
+    def from_file(cls, path, keep_votes=True):
+        """Loads a PairwiseBallotBox from a ballot file written by `write_ballot_file`. The file is
+        memory-mapped and tallied directly from the mapped rows, and the votes that are kept are
+        views of the file, so they are never parsed or copied into memory.
+
+        :param path: the path of a ballot file of pairwise votes
+        :param keep_votes: whether to keep the votes, as in `__init__`
+        :raises InvalidBallotDataException: if the file isn't a valid ballot file of pairwise votes
+        """
+        ballot_file = _read_ballot_file(path, PAIRWISE)
+        ballot_box = cls([], ballot_file.candidate_ids, keep_votes=keep_votes)
+        ballot_box.candidates = set(ballot_file.candidate_ids)
+
+        columns = ballot_file.columns()
+        ballot_box._count_encoded(*columns)
+        if keep_votes:
+            ballot_box.vote_store.append(*columns)
+        return ballot_box
+
+    @property
+    def ballots(self) -> list:
+        """The votes in this ballot box, as tuples, in the order they were added. They are decoded
+        from `vote_store` every time this is read.
+
+        :raises ValueError: if this ballot box was created with `keep_votes=False`
+        """
+        if self.vote_store is None:
+            raise ValueError("This ballot box was created with keep_votes=False")
+        return self.vote_store.decode()
 
-    @staticmethod
-    def __get_all_candidates_from_votes(votes) -> set:
-        """:return: All the candidates mentioned in the votes"""
-        return {vote[0] for vote in votes} | {vote[1] for vote in votes}
+    def add_votes(self, votes):
+        """Adds votes to this ballot box. Only the new votes are validated and counted, so this
+        takes time proportional to the number of new votes, not the number of votes in the box.
 
-    @staticmethod
-    def __ensure_valid_votes(votes: iter) -> list:
+        Orderings created by `enable_ordering_based_methods` are discarded, as they no longer
+        reflect the votes in this ballot box.
+
+        :param votes: an iterable of votes, as described in `__init__`
+        :raises InvalidBallotDataException: if given any invalid votes, in which case none of the
+        votes are added
+        """
+        votes = self._ensure_valid_votes(votes)
+        encoded = self._count(votes)
+        if self.vote_store is not None:
+            self.vote_store.append(*encoded)
+
+    def add_columns(self, first, second, results):
+        """Adds votes given column by column, rather than vote by vote, to this ballot box. This is
+        for bulk loaders, which can validate and encode whole columns at once without building a
+        tuple for each vote.
+
+        :param first: the first candidate of each vote
+        :param second: the second candidate of each vote
+        :param results: the result of each vote, each one of "win", "loss", or "tie"
+        :raises InvalidBallotDataException: if the columns have different lengths, or given any
+        invalid result, or any candidate not in `candidates` if the candidates are fixed. In that
+        case none of the votes are added.
+        """
+        encoded = self._encode_columns(first, second, results)
+        self._count_encoded(*encoded)
+        if self.vote_store is not None:
+            self.vote_store.append(*encoded)
+
+    def _encode_columns(self, first, second, results) -> tuple:
+        """Validates and encodes votes given as columns, as described in `add_columns`.
+
+        :return: the votes, encoded as in `PairwiseTally.encode`
+        """
+        if not len(first) == len(second) == len(results):
+            raise InvalidBallotDataException("Columns of votes must all be the same length")
+
+        known_candidates = len(self.tally)
+        try:
+            encoded = self.tally.encode_columns(
+                first, second, results, intern=not self.__has_fixed_candidates
+            )
+        except KeyError as e:
+            raise InvalidBallotDataException(f"Votes mention unknown candidate or result {e}")
+        if not self.__has_fixed_candidates:
+            self.candidates.update(self.tally.ids[known_candidates:])
+        return encoded
+
+    def remove_votes(self, votes):
+        """Retracts votes previously added to this ballot box, in time proportional to the number of
+        retracted votes. A vote is the same as another if it has the same effect on the tallies, so
+        retracting `("a", "b", "win")` can retract an earlier `("b", "a", "loss")`.
+
+        Orderings created by `enable_ordering_based_methods` are discarded, as they no longer
+        reflect the votes in this ballot box.
+
+        :param votes: an iterable of votes, as described in `__init__`
+        :raises InvalidBallotDataException: if given any invalid votes, or any vote that is not in
+        this ballot box, in which case none of the votes are retracted
+        """
+        votes = self._ensure_valid_votes(votes)
+        encoded = self._uncount(votes)
+        if self.vote_store is not None:
+            self.vote_store.retract(*encoded)
+
+    def _count(self, votes: list) -> tuple:
+        """Counts votes that have already been validated.
+
+        :return: the votes, encoded as in `PairwiseTally.encode`
+        """
+        known_candidates = len(self.tally)
+        encoded = self.tally.encode(votes)
+        if not self.__has_fixed_candidates:
+            self.candidates.update(self.tally.ids[known_candidates:])
+        self._count_encoded(*encoded)
+        return encoded
+
+    def _count_encoded(self, first, second, results):
+        """Counts votes over the candidates in this ballot box, encoded as in
+        `PairwiseTally.encode`."""
+        self.tally.add_encoded(first, second, results)
+        self.__ballots_changed()
+
+    def _uncount(self, votes: list) -> tuple:
+        """Stops counting votes that have already been validated.
+
+        :return: the votes, encoded as in `PairwiseTally.encode`
+        :raises InvalidBallotDataException: if any of the votes were not counted
+        """
+        try:
+            encoded = self.tally.encode(votes, intern=False)
+            self.tally.remove_encoded(*encoded)
+        except KeyError as e:
+            raise InvalidBallotDataException(f"Cannot remove votes for unknown candidate {e}")
+        except ValueError as e:
+            raise InvalidBallotDataException(e)
+        self.__ballots_changed()
+        return encoded
+
+    def _count_tally(self, tally: PairwiseTally) -> np.ndarray:
+        """Counts the votes counted by another tally, as in `PairwiseTally.merge`.
+
+        :return: the index in this ballot box of each candidate index in `tally`
+        """
+        known_candidates = len(self.tally)
+        mapping = self.tally.merge(tally)
+        if not self.__has_fixed_candidates:
+            self.candidates.update(self.tally.ids[known_candidates:])
+        self.__ballots_changed()
+        return mapping
+
+    def _count_rankings(self, ranks, counts=None):
+        """Counts ranked ballots given as a rank-position matrix over the candidates in this ballot
+        box, as in `PairwiseTally.add_rankings`."""
+        self.tally.add_rankings(ranks, counts)
+        self.__ballots_changed()
+
+    def __ballots_changed(self):
+        self.version += 1
+        self.ordering_ballot_box = None
+
+    def _ensure_valid_votes(self, votes: iter, length=3) -> list:
+        """Checks that each vote has `length` elements, and that the first three are a pairwise
+        vote between candidates in this ballot box.
+
+        :return: the votes, as a list
+        """
+        if not isinstance(votes, list):
+            votes = list(votes)
         for vote in votes:
-            if not len(vote) == 3:
+            if not len(vote) == length:
                 raise InvalidBallotDataException(
-                    "Expected a vote of length three, got " + str(vote)
+                    f"Expected a vote of length {length}, got " + str(vote)
                 )
 
             if not vote[2] in {"win", "loss", "tie"}:
@@ -148,85 +390,33 @@ class PairwiseBallotBox(BallotBox):
                     """Expected type to be one of {"win", "loss", "tie"}, got""" + str(vote)
                 )
 
-        return list(votes)
+            if self.__has_fixed_candidates and not (
+                vote[0] in self.tally.index and vote[1] in self.tally.index
+            ):
+                raise InvalidBallotDataException(
+                    f"Vote {vote} mentions a candidate that is not in {self.candidates}"
+                )
+
+        return votes
 
     def get_candidates(self) -> set:
         return self.candidates
 
-    def get_victory_graph(self) -> nx.DiGraph:
-        matchups = self.get_matchup_graph()
-        edges_to_remove = []
-        for u, v in matchups.edges:
-            margin_u_to_v = matchups.get_edge_data(u, v)["margin"]
-            margin_v_to_u = matchups.get_edge_data(v, u)["margin"]
-
-            # u->v has lower win margin than v->u, keep the "winning edge" with higher win ratio
-            # this will remove both if there is a perfect tie - but that's okay
-            if margin_u_to_v <= margin_v_to_u:
-                edges_to_remove.append((u, v))
+    @cached_until_ballots_change
+    def get_pairwise_graph(self) -> PairwiseGraph:
+        return PairwiseGraph(self.tally)
 
-        matchups.remove_edges_from(edges_to_remove)
-        return matchups
+    @cached_until_ballots_change
+    def get_victory_graph(self) -> nx.DiGraph:
+        return nx.freeze(self.get_pairwise_graph().to_networkx(victory=True))
 
+    @cached_until_ballots_change
     def get_matchup_graph(self) -> nx.DiGraph:
-        matchups = self.get_matchups()
-        ids = matchups.keys()
-
-        g = nx.DiGraph()
-        g.add_nodes_from(ids)
-        for candidate1 in matchups:
-            for candidate2 in matchups[candidate1]:
-                candidate1to2 = matchups[candidate1][candidate2]
-                total_votes_candidate1to2 = sum(candidate1to2.values())
-                if total_votes_candidate1to2 != 0:
-                    g.add_edge(
-                        candidate1,
-                        candidate2,
-                        wins=candidate1to2["wins"],
-                        losses=candidate1to2["losses"],
-                        ties=candidate1to2["ties"],
-                        margin=candidate1to2["wins"] / total_votes_candidate1to2,
-                    )
-
-                candidate2to1 = matchups[candidate2][candidate1]
-                total_votes_candidate2to1 = sum(candidate2to1.values())
-                if total_votes_candidate2to1 != 0:
-                    g.add_edge(
-                        candidate2,
-                        candidate1,
-                        wins=candidate2to1["wins"],
-                        losses=candidate2to1["losses"],
-                        ties=candidate2to1["ties"],
-                        margin=candidate2to1["wins"] / total_votes_candidate2to1,
-                    )
-
-        return g
-
-    def get_matchups(self) -> dict:
-        matchups = {}
-        for candidate in self.candidates:
-            matchups[candidate] = {}
-
-        for candidate1 in self.candidates:
-            for candidate2 in self.candidates:
-                if candidate1 == candidate2:
-                    continue
-                matchups[candidate1][candidate2] = {"wins": 0, "losses": 0, "ties": 0}
-                matchups[candidate2][candidate1] = {"wins": 0, "losses": 0, "ties": 0}
-
-        for vote in self.ballots:
-            candidate1, candidate2, result = vote
-            if result == "win":
-                matchups[candidate1][candidate2]["wins"] += 1
-                matchups[candidate2][candidate1]["losses"] += 1
-            if result == "loss":
-                matchups[candidate1][candidate2]["losses"] += 1
-                matchups[candidate2][candidate1]["wins"] += 1
-            if result == "tie":
-                matchups[candidate1][candidate2]["ties"] += 1
-                matchups[candidate2][candidate1]["ties"] += 1
-
-        return matchups
+        return nx.freeze(self.get_pairwise_graph().to_networkx())
+
+    @cached_until_ballots_change
+    def get_matchups(self) -> MatchupView:
+        return MatchupView(self.tally)
 
     def get_orderings(self):
         if self.ordering_ballot_box is None:
@@ -234,13 +424,20 @@ class PairwiseBallotBox(BallotBox):
         else:
             return self.ordering_ballot_box.get_orderings()
 
+    def get_weighted_orderings(self):
+        if self.ordering_ballot_box is None:
+            return None
+        else:
+            return self.ordering_ballot_box.get_weighted_orderings()
+
     def enable_ordering_based_methods(self, intransitivity_resolver, incompleteness_resolver):
         super().enable_ordering_based_methods(intransitivity_resolver, incompleteness_resolver)
         self.ordering_ballot_box = RankedChoiceBallotBox(
-            [
-                vote_induction([ballot], intransitivity_resolver, incompleteness_resolver)
-                for ballot in self.ballots
-            ]
+            induce_orderings(
+                ([ballot] for ballot in self.ballots),
+                intransitivity_resolver,
+                incompleteness_resolver,
+            )
         )
 
 
@@ -253,37 +450,142 @@ class VoterTrackingPairwiseBallotBox(BallotBox):
     more of the underlying data, and the conversion only has to happen once.
     """
 
-    def __init__(self, votes, candidates=None):
+    def __init__(self, votes, candidates=None, keep_votes=True, chunk_size=DEFAULT_CHUNK_SIZE):
         """
 
         :param votes: An iterable of votes, where a vote is any indexable object of length 4. The
         first three elements must be the same as PairwiseBallotBox, and the fourth indicates the
-        id of the voter who placed the vote.
+        id of the voter who placed the vote. As in PairwiseBallotBox, the votes are consumed once,
+        `chunk_size` at a time.
 
         :param candidates: None, meaning to infer the candidate set from the votes, or a
                            collection of the candidates that were being voted on in this election.
 
+        :param keep_votes: whether to store the votes themselves, rather than only the tallies.
+                           See PairwiseBallotBox.
+
+        :param chunk_size: the number of votes to validate and count at a time.
+
         :raises InvalidVoteShapeException: if given any invalid votes
         """
-        self.votes = list(votes)
         # Lean on PairwiseBallotBox for pairwise methods. We don't care about who placed a vote
-        # if all that matters is the number of wins/losses/ties in each matchup.
-        votes_without_voter_ids = [v[0:3] for v in votes]
-        self.pairwise_ballot_box = PairwiseBallotBox(votes_without_voter_ids, candidates)
+        # if all that matters is the number of wins/losses/ties in each matchup, and the votes
+        # themselves are stored here, so the PairwiseBallotBox only needs the tallies.
+        self.pairwise_ballot_box = PairwiseBallotBox([], candidates, keep_votes=False)
+        self.vote_store = (
+            VoteStore(self.pairwise_ballot_box.tally.ids, track_voters=True) if keep_votes else None
+        )
 
         # Lazily initialize the ordering ballot box.
         self.ordering_ballot_box = None
 
+        for chunk in chunked(votes, chunk_size):
+            self.add_votes(chunk)
+
+    @classmethod
+    def from_file(cls, path, keep_votes=True):
+        """Loads a VoterTrackingPairwiseBallotBox from a ballot file written by `write_ballot_file`,
+        tallying directly from the memory-mapped file. See `PairwiseBallotBox.from_file`.
+
+        :param path: the path of a ballot file of voter-tracking pairwise votes
+        :param keep_votes: whether to keep the votes, as in `__init__`
+        :raises InvalidBallotDataException: if the file isn't a valid ballot file of voter-tracking
+        pairwise votes
+        """
+        ballot_file = _read_ballot_file(path, VOTER_TRACKING_PAIRWISE)
+        ballot_box = cls([], ballot_file.candidate_ids, keep_votes=keep_votes)
+        ballot_box.pairwise_ballot_box.candidates = set(ballot_file.candidate_ids)
+
+        columns = ballot_file.columns()
+        ballot_box.pairwise_ballot_box._count_encoded(*columns[:3])
+        if keep_votes:
+            for voter in ballot_file.voter_ids:
+                ballot_box.vote_store.intern_voter(voter)
+            ballot_box.vote_store.append(*columns)
+        return ballot_box
+
+    @property
+    def votes(self) -> list:
+        """The votes in this ballot box, as tuples, in the order they were added. They are decoded
+        from `vote_store` every time this is read.
+
+        :raises ValueError: if this ballot box was created with `keep_votes=False`
+        """
+        if self.vote_store is None:
+            raise ValueError("This ballot box was created with keep_votes=False")
+        return self.vote_store.decode()
+
+    def add_votes(self, votes):
+        """Adds votes to this ballot box, in time proportional to the number of new votes. See
+        `PairwiseBallotBox.add_votes`.
+
+        :param votes: an iterable of votes, as described in `__init__`
+        :raises InvalidBallotDataException: if given any invalid votes, in which case none of the
+        votes are added
+        """
+        votes = self.pairwise_ballot_box._ensure_valid_votes(votes, length=4)
+        encoded = self.pairwise_ballot_box._count(votes)
+        if self.vote_store is not None:
+            self.vote_store.append(*encoded, self.vote_store.encode_voters(v[3] for v in votes))
+        self.ordering_ballot_box = None
+
+    def add_columns(self, first, second, results, voters):
+        """Adds votes given column by column to this ballot box. See
+        `PairwiseBallotBox.add_columns`.
+
+        :param voters: the voter who placed each vote
+        :raises InvalidBallotDataException: if given any invalid votes, in which case none of the
+        votes are added
+        """
+        if not len(voters) == len(results):
+            raise InvalidBallotDataException("Columns of votes must all be the same length")
+        encoded = self.pairwise_ballot_box._encode_columns(first, second, results)
+        self.pairwise_ballot_box._count_encoded(*encoded)
+        if self.vote_store is not None:
+            self.vote_store.append(*encoded, self.vote_store.encode_voters(voters))
+        self.ordering_ballot_box = None
+
+    def remove_votes(self, votes):
+        """Retracts votes previously placed by the same voters, in time proportional to the number
+        of retracted votes. See `PairwiseBallotBox.remove_votes`.
+
+        :param votes: an iterable of votes, as described in `__init__`
+        :raises InvalidBallotDataException: if given any invalid votes, or any vote that the voter
+        did not place, in which case none of the votes are retracted. If this ballot box was
+        created with `keep_votes=False`, only checks that the votes were counted, not who placed
+        them.
+        """
+        votes = self.pairwise_ballot_box._ensure_valid_votes(votes, length=4)
+        if self.vote_store is not None:
+            try:
+                encoded = self.pairwise_ballot_box.tally.encode(votes, intern=False)
+                voters = self.vote_store.encode_voters((v[3] for v in votes), intern=False)
+                self.vote_store.retract(*encoded, voters)
+            except KeyError as e:
+                raise InvalidBallotDataException(f"Cannot remove votes of unknown {e}")
+            except ValueError as e:
+                raise InvalidBallotDataException(e)
+
+        self.pairwise_ballot_box._uncount(votes)
+        self.ordering_ballot_box = None
+
+    @property
+    def version(self):
+        return self.pairwise_ballot_box.version
+
     def get_candidates(self) -> set:
         return self.pairwise_ballot_box.candidates
 
+    def get_pairwise_graph(self) -> PairwiseGraph:
+        return self.pairwise_ballot_box.get_pairwise_graph()
+
     def get_victory_graph(self) -> nx.DiGraph:
         return self.pairwise_ballot_box.get_victory_graph()
 
     def get_matchup_graph(self) -> nx.DiGraph:
         return self.pairwise_ballot_box.get_matchup_graph()
 
-    def get_matchups(self) -> dict:
+    def get_matchups(self) -> MatchupView:
         return self.pairwise_ballot_box.get_matchups()
 
     def supports_ordering_based_methods(self):
@@ -295,7 +597,34 @@ class VoterTrackingPairwiseBallotBox(BallotBox):
         else:
             return None
 
-    def enable_ordering_based_methods(self, intransitivity_resolver, incompleteness_resolver):
+    def get_weighted_orderings(self):
+        if self.ordering_ballot_box:
+            return self.ordering_ballot_box.get_weighted_orderings()
+        else:
+            return None
+
+    def enable_ordering_based_methods(
+        self,
+        intransitivity_resolver,
+        incompleteness_resolver,
+        workers=1,
+        executor=None,
+        chunk_size=DEFAULT_INDUCTION_CHUNK_SIZE,
+    ):
+        """Resolves each voter's set of votes into an ordering, one per voter, in the order the
+        voters first voted. See `BallotBox.enable_ordering_based_methods`.
+
+        Each voter is resolved independently, so voters can be resolved by a pool of processes,
+        `chunk_size` voters at a time. The resolvers are sent to the workers with every chunk, so
+        they must be picklable, as the ones made by the resolver factories are. The orderings are
+        collected in voter order, however the chunks are scheduled.
+
+        :param workers: the number of worker processes, or None for one per CPU. With one worker,
+        and no executor, the voters are resolved in this process.
+        :param executor: None, or a `concurrent.futures.Executor` to resolve the voters with,
+        instead of starting a pool of `workers` processes. It is not shut down afterwards.
+        :param chunk_size: the number of voters each worker resolves at a time
+        """
         voter_to_vote_set = {}
 
         for vote in self.votes:
@@ -308,19 +637,32 @@ class VoterTrackingPairwiseBallotBox(BallotBox):
 
         # Now, voter_to_vote_set is a mapping from a voter to a set of orderings. We want to
         # create an ordering for each.
-
-        orderings = []
-        for voter, vote_set in voter_to_vote_set.items():
-            orderable_set = incompleteness_resolver(intransitivity_resolver(vote_set))
-            ordering = list(nx.topological_sort(orderable_set))
-            orderings.append(ordering)
+        vote_sets = list(voter_to_vote_set.values())
+        resolvers = intransitivity_resolver, incompleteness_resolver
+        workers = workers or os.cpu_count() or 1
+        if executor is not None:
+            orderings = _induce_in_chunks(executor, vote_sets, resolvers, chunk_size)
+        elif workers == 1:
+            orderings = induce_orderings(vote_sets, *resolvers)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                orderings = _induce_in_chunks(pool, vote_sets, resolvers, chunk_size)
 
         # And then use those orderings as the basis for our ordering methods. One per voter.
         self.ordering_ballot_box = RankedChoiceBallotBox(orderings, self.get_candidates())
 
 
+def _induce_in_chunks(executor, vote_sets, resolvers, chunk_size) -> list:
+    """:return: the ordering induced from each of `vote_sets`, in order, having induced them
+    `chunk_size` vote sets at a time with `executor`."""
+    chunks = executor.map(
+        induce_orderings, chunked(vote_sets, chunk_size), *(repeat(r) for r in resolvers)
+    )
+    return [ordering for chunk in chunks for ordering in chunk]
+
+
 class RankedChoiceBallotBox(BallotBox):
-    def __init__(self, ballots, candidates=None):
+    def __init__(self, ballots, candidates=None, trusted=False):
         """Creates a RankedChoiceBallotBox from the given ballots. Each ballot must be a list, where
         each element is either a candidate or a set of candidates. A single candidate in a ballot
         represents that candidate being at that position, and a set represents a tie for that
@@ -329,25 +671,62 @@ class RankedChoiceBallotBox(BallotBox):
         Each ballot must contain every candidate found in candidates, or if candidates is not
         provided, the candidates mentioned in every other ballot.
 
+        Identical ballots are only stored once, along with the number of times they were cast, so
+        the work done by this ballot box scales with the number of distinct ballots. Which distinct
+        ballot each ballot was is kept too, so `get_orderings` returns them in the order they were
+        cast.
+
         :param ballots: a list of ballots, as described above.
         :param candidates: the set of candidates being voted on. Inferred from ballots if not
         provided.
+        :param trusted: skip validating the ballots, for ballots that were already validated. The
+        results are undefined if they are not valid.
         """
-        self.ballots = self.__ensure_valid_ballots(ballots, candidates)
-        self.ballots_all_sets = self.__convert_to_sets(self.ballots)
+        self.__init_from_ranks(*self.__encode(ballots, candidates, trusted))
 
-        # We want to convert to pairwise ballots because there's no use reimplementing the code in
-        # PairwiseBallotBox for rankings, we can just convert a ranking to its constituent
-        # pairwise preferences and create our own PairwiseBallotBox that we can forward
-        # requests for pairwise-result based rankings to.
-        pairwise_ballots = flatten(
-            util.ranking_to_pairwise_ballots(ballot) for ballot in self.ballots_all_sets
-        )
+    @classmethod
+    def from_file(cls, path):
+        """Loads a RankedChoiceBallotBox from a ballot file written by `write_ballot_file`. The file
+        is memory-mapped, and `ranks` and `counts` are views of the mapped rows, so the ballots are
+        tallied without being parsed or copied into memory.
 
-        self.pairwise_ballot_box = PairwiseBallotBox(pairwise_ballots)
+        :param path: the path of a ballot file of ranked ballots
+        :raises InvalidBallotDataException: if the file isn't a valid ballot file of ranked ballots
+        """
+        ballot_file = _read_ballot_file(path, RANKED)
+        ballot_box = cls.__new__(cls)
+        ballot_box.__init_from_ranks(
+            ballot_file.candidate_ids, ballot_file.rows["ranks"], ballot_file.rows["count"], None
+        )
+        return ballot_box
+
+    def __init_from_ranks(self, candidate_ids, ranks, counts, ballot_rows):
+        self.candidate_ids, self.ranks, self.counts = candidate_ids, ranks, counts
+        """The position of each candidate on each distinct ballot, where `ranks[b, i]` is the
+        position of `candidate_ids[i]` on ballot `b`, and tied candidates share a position, and
+        the number of times each distinct ballot was cast."""
+        self.ballot_rows = ballot_rows
+        """The row of `ranks` of each ballot, in the order they were cast, or None if that order
+        isn't known, as for ballot files, which only store the distinct ballots."""
+        self.candidates = set(self.candidate_ids)
+        self._profile = None
+
+        # There's no use reimplementing the code in PairwiseBallotBox for rankings, so we create our
+        # own PairwiseBallotBox that we can forward requests for pairwise-result based rankings to.
+        # Rather than converting each ranking into its O(C²) pairwise preferences, it tallies them
+        # straight from the position of each candidate on each distinct ballot.
+        self.pairwise_ballot_box = PairwiseBallotBox([], self.candidate_ids, keep_votes=False)
+        self.pairwise_ballot_box._count_rankings(self.ranks, self.counts)
+
+    @property
+    def version(self):
+        return self.pairwise_ballot_box.version
 
     def get_candidates(self) -> set:
-        return self.pairwise_ballot_box.candidates
+        return self.candidates
+
+    def get_pairwise_graph(self) -> PairwiseGraph:
+        return self.pairwise_ballot_box.get_pairwise_graph()
 
     def get_victory_graph(self) -> nx.DiGraph:
         return self.pairwise_ballot_box.get_victory_graph()
@@ -355,53 +734,229 @@ class RankedChoiceBallotBox(BallotBox):
     def get_matchup_graph(self) -> nx.DiGraph:
         return self.pairwise_ballot_box.get_matchup_graph()
 
-    def get_matchups(self) -> dict:
+    def get_matchups(self) -> MatchupView:
         return self.pairwise_ballot_box.get_matchups()
 
-    def __ensure_valid_ballots(self, ballots, candidates):
-        if not len(ballots):
+    @classmethod
+    def _from_counts(cls, distinct: dict, rows, candidates=None, trusted=False):
+        """Creates a RankedChoiceBallotBox from ballots already counted by `_count_ranked_ballots`,
+        for loaders that count ballots as they read them."""
+        ballot_box = cls.__new__(cls)
+        ballot_box.__init_from_ranks(*cls.__encode_counts(distinct, rows, candidates, trusted))
+        return ballot_box
+
+    @staticmethod
+    def __encode(ballots, candidates, trusted) -> tuple:
+        """Counts the distinct ballots in a single pass over them, and encodes them as in
+        `__encode_counts`."""
+        distinct, rows = {}, array("q")
+        _count_ranked_ballots(ballots, distinct, rows, trusted)
+        return RankedChoiceBallotBox.__encode_counts(distinct, rows, candidates, trusted)
+
+    @staticmethod
+    def __encode_counts(distinct, rows, candidates, trusted) -> tuple:
+        """Encodes the distinct ballots into rows of positions, and then validates those rows with
+        array operations (unless the ballots are `trusted`).
+
+        :param distinct: the number of each distinct ballot, as counted by `_count_ranked_ballots`
+        :param rows: the number of the distinct ballot each ballot was, in the order they were cast
+        :return: the list of candidate ids in index order, the matrix of the position of each
+        candidate on each distinct ballot, the number of times each distinct ballot was cast, and
+        the row of each ballot.
+        """
+        if not distinct:
             raise InvalidBallotDataException(
                 "Cannot create RankedChoiceBallotBox with empty ballot list"
             )
-        for ballot in ballots:
-            if not isinstance(ballot, list):
-                raise InvalidBallotDataException(
-                    f"Ballots must be a collection of lists, one ballot was {ballot}"
-                )
+
+        # Flatten the distinct ballots into one candidate and one position per entry
+        mentioned, flat_candidates, flat_positions = [], [], []
+        for key in distinct:
+            if key and key[0] is _TIED:
+                # Empty ties don't take up a position, so the positions stay compact
+                for position, tied in enumerate(tied for tied in key[1:] if tied):
+                    flat_candidates.extend(tied)
+                    flat_positions.extend([position] * len(tied))
+                mentioned.append(sum(map(len, key[1:])))
+            else:
+                flat_candidates.extend(key)
+                flat_positions.extend(range(len(key)))
+                mentioned.append(len(key))
 
         # Need to either get or infer the candidate set to validate that ballots are full, and to
         # ensure that each ballot doesn't contain elements not in the candidate set.
         if candidates:
-            candidate_set = set(candidates)
-            if not len(candidates) == len(candidate_set):
+            index = {candidate: i for i, candidate in enumerate(candidates)}
+            if not len(candidates) == len(index):
                 raise InvalidElectionDataException(f"Duplicate candidates in {candidates}")
         else:
-            candidate_set = set()
-            for ballot in ballots:
-                try:
-                    candidate_set |= util.candidates_in_ranked_choice_ballot(ballot)
-                except ValueError as e:
-                    raise InvalidBallotDataException(e)
-
-        for ballot in ballots:
-            try:
-                ballot_contents = util.candidates_in_ranked_choice_ballot(ballot)
-            except ValueError as e:
-                raise InvalidBallotDataException(e)
+            index = {candidate: i for i, candidate in enumerate(dict.fromkeys(flat_candidates))}
 
-            if ballot_contents != candidate_set:
+        try:
+            columns = np.fromiter(
+                map(index.__getitem__, flat_candidates), dtype=np.intp, count=len(flat_candidates)
+            )
+        except KeyError as e:
+            raise InvalidBallotDataException(f"Ballots mention unknown candidate {e}")
+        entries = np.repeat(np.arange(len(distinct)), mentioned)
+
+        ranks = np.zeros((len(distinct), len(index)), dtype=np.int32)
+        ranks[entries, columns] = flat_positions
+
+        if not trusted:
+            # A ballot is valid if it mentions as many distinct candidates as there are candidates
+            # (so it is full), and mentions no more candidates than that (so there are no repeats).
+            present = np.zeros(ranks.shape, dtype=bool)
+            present[entries, columns] = True
+            found = np.count_nonzero(present, axis=1)
+
+            for row in np.flatnonzero((found != mentioned) | (found != len(index)))[:1]:
+                ballot = _decode_key(next(islice(distinct, int(row), None)))
+                if found[row] != mentioned[row]:
+                    raise InvalidBallotDataException(f"A candidate is repeated in {ballot}")
                 raise InvalidBallotDataException(
-                    f"Ballot {ballot} did not contain exactly {candidate_set}."
+                    f"Ballot {ballot} did not contain exactly {set(index)}."
                 )
 
-        return ballots
+        ballot_rows = np.frombuffer(rows, dtype=np.int64) if len(rows) else np.zeros(0, np.int64)
+        if any(key and key[0] is _TIED for key in distinct):
+            # A ballot with ties can be the same ordering as a ballot without, like `[1, {2}]` and
+            # `[1, 2]`, so merge identical rows, keeping the rows in order of first appearance.
+            _, first, inverse = np.unique(ranks, axis=0, return_index=True, return_inverse=True)
+            order = np.argsort(first)
+            ranks = ranks[first[order]]
+            ballot_rows = np.argsort(order)[inverse.ravel()][ballot_rows]
+        weights = np.bincount(ballot_rows, minlength=len(ranks)).astype(np.int64)
+        return list(index), ranks, weights, ballot_rows
+
+    @property
+    def profile(self) -> list:
+        """Each distinct ballot, as a tuple of frozensets, and the number of times it was cast. This
+        is decoded from `ranks` the first time it is read."""
+        if self._profile is None:
+            profile = {}
+            for ballot, count in zip(self.__decoded_rows(), self.counts.tolist()):
+                profile[ballot] = profile.get(ballot, 0) + count
+            self._profile = list(profile.items())
+        return self._profile
+
+    def __decoded_rows(self) -> list:
+        """:return: each row of `ranks`, as a tuple of frozensets of the candidates at each
+        position."""
+        order = np.argsort(self.ranks, axis=1, kind="stable")
+        return [
+            tuple(
+                frozenset(self.candidate_ids[i] for _, i in tied)
+                for _, tied in groupby(
+                    zip(self.ranks[row, order[row]].tolist(), order[row].tolist()),
+                    key=lambda position_and_candidate: position_and_candidate[0],
+                )
+            )
+            for row in range(len(self.ranks))
+        ]
+
+    @property
+    def ballots(self) -> list:
+        """Every ballot, as a list of sets. Deprecated, use `get_orderings` instead."""
+        warnings.warn(
+            "RankedChoiceBallotBox.ballots is deprecated, use get_orderings() instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.get_orderings()
 
-    def __convert_to_sets(self, ballots):
-        """Takes ballots, which may include single items at rankings which do not have ties, into a list of sets."""
-        return [util.ranking_with_all_sets(b) for b in ballots]
+    @property
+    def ballots_all_sets(self) -> list:
+        """Every ballot, as a list of sets. See `get_orderings`."""
+        return self.get_orderings()
 
     def get_orderings(self):
-        return self.ballots_all_sets
+        """:return: a fresh list of every ballot, as a list of sets, in the order they were cast.
+        For ballot boxes loaded from a ballot file, identical ballots are grouped together."""
+        ballot_rows = self.ballot_rows
+        if ballot_rows is None:
+            ballot_rows = np.repeat(np.arange(len(self.ranks)), self.counts)
+        decoded = self.__decoded_rows()
+        return [[set(tied) for tied in decoded[row]] for row in ballot_rows.tolist()]
+
+    def get_weighted_orderings(self):
+        return self.profile
+
+
+def write_ballot_file(path, ballot_box: BallotBox):
+    """Writes the ballots in a ballot box to a binary ballot file at `path`, in the format described
+    in `socialchoice.ballot_file`, so that they can be loaded again with `from_file`. Only
+    `PairwiseBallotBox`es created with `keep_votes=True`, `VoterTrackingPairwiseBallotBox`es created
+    with `keep_votes=True`, and `RankedChoiceBallotBox`es can be written.
+
+    :raises ValueError: if the ballot box can't be written, or any of its ids can't be stored
+    """
+    if isinstance(ballot_box, RankedChoiceBallotBox):
+        write_rankings(path, ballot_box.candidate_ids, ballot_box.ranks, ballot_box.counts)
+    elif isinstance(ballot_box, (PairwiseBallotBox, VoterTrackingPairwiseBallotBox)):
+        vote_store = ballot_box.vote_store
+        if vote_store is None:
+            raise ValueError("Cannot write a ballot box that was created with keep_votes=False")
+        columns = vote_store.columns()
+        voters = columns[3] if vote_store.tracks_voters else None
+        write_votes(
+            path,
+            vote_store.candidate_ids,
+            *columns[:3],
+            voter_ids=vote_store.voter_ids,
+            voters=voters,
+        )
+    else:
+        raise ValueError(f"Cannot write ballot box of type {type(ballot_box).__name__}")
+
+
+def _read_ballot_file(path, kind):
+    """:return: the ballot file at `path`, as read by `read_ballot_file`.
+    :raises InvalidBallotDataException: if it is not a valid ballot file of `kind` ballots
+    """
+    try:
+        ballot_file = read_ballot_file(path)
+    except (ValueError, KeyError) as e:
+        raise InvalidBallotDataException(e)
+    if ballot_file.kind != kind:
+        raise InvalidBallotDataException(f"{path} does not hold the right kind of ballots")
+    return ballot_file
+
+
+def _count_ranked_ballots(ballots, distinct: dict, rows: array, trusted=False):
+    """Numbers each distinct ranked ballot in `distinct`, in the order they first appear, and
+    appends the number of each ballot to `rows`, in a single pass over the ballots.
+
+    Ballots without ties are hashable as they are, so only ballots with ties need their positions
+    converted to frozensets to be counted. Those are marked with `_TIED`, so that they can't be
+    confused with a ballot of candidates that happen to be frozensets.
+
+    :raises InvalidBallotDataException: if a ballot is not a list, unless the ballots are `trusted`
+    """
+    for ballot in ballots:
+        if not trusted and not isinstance(ballot, list):
+            raise InvalidBallotDataException(
+                f"Ballots must be a collection of lists, one ballot was {ballot}"
+            )
+        try:
+            key = tuple(ballot)
+            rows.append(distinct.setdefault(key, len(distinct)))
+        except TypeError:
+            key = (_TIED,) + tuple(
+                frozenset(c) if isinstance(c, set) else frozenset((c,)) for c in ballot
+            )
+            rows.append(distinct.setdefault(key, len(distinct)))
+
+
+_TIED = object()
+"""Marks the keys of ballots with ties while RankedChoiceBallotBox counts distinct ballots."""
+
+
+def _decode_key(key: tuple) -> list:
+    """:return: the ballot counted as `key` by `_count_ranked_ballots`, with its ties as sets."""
+    if key and key[0] is _TIED:
+        return [set(tied) for tied in key[1:]]
+    return list(key)
 
 
 class InvalidElectionDataException(Exception):
@@ -0,0 +1,183 @@
+"""
+A binary file format for ballots, which can be memory-mapped and tallied without parsing.
+
+A ballot file is laid out as follows, with all integers little-endian:
+
+    offset 0:  the magic string `SCBALLOT` (8 bytes)
+    offset 8:  the format version, currently 1 (uint16)
+    offset 10: the kind of ballots, `PAIRWISE`, `VOTER_TRACKING_PAIRWISE`, or `RANKED` (uint16)
+    offset 12: reserved, always 0 (uint32)
+    offset 16: the length in bytes of the id tables (uint64)
+    offset 24: the number of rows (uint64)
+    offset 32: the id tables, as a UTF-8 JSON object with the lists `"candidates"` and `"voters"`
+               of ids in index order, followed by zero padding up to a multiple of 8 bytes
+    then:      the rows, each with the fixed-width layout `row_dtype` for the kind of ballots
+
+Ids must be strings, numbers, booleans, or None, so that they survive the round trip through JSON.
+
+Pairwise rows are the indices of the two candidates (int32) and the result code (int8), as
+encoded by `PairwiseTally.encode`, and then for voter-tracking pairwise ballots, the index of the
+voter (int32). Ranked rows are the number of times the ballot was cast (int64) and then the
+position of each candidate on that ballot (int32 per candidate), as in `PairwiseTally.add_rankings`.
+
+Files are written with `write_votes` and `write_rankings`, and read with `read_ballot_file`, which
+maps the file into memory instead of reading it. The ballot boxes' `from_file` loaders tally
+straight from the mapped rows.
+"""
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+MAGIC = b"SCBALLOT"
+FORMAT_VERSION = 1
+PAIRWISE, VOTER_TRACKING_PAIRWISE, RANKED = 0, 1, 2
+
+_HEADER = struct.Struct("<8sHHIQQ")
+_ALIGNMENT = 8
+WRITE_CHUNK_ROWS = 1_000_000
+"""The number of rows that are converted to the file layout and written, or checked once read, at a
+time."""
+
+
+def row_dtype(kind: int, n_candidates: int = 0) -> np.dtype:
+    """:return: the layout of a row in a ballot file holding `kind` ballots. Ranked rows depend on
+    the number of candidates, as they have a position for each."""
+    if kind == PAIRWISE:
+        return np.dtype([("first", "<i4"), ("second", "<i4"), ("result", "i1")])
+    if kind == VOTER_TRACKING_PAIRWISE:
+        return np.dtype([("first", "<i4"), ("second", "<i4"), ("result", "i1"), ("voter", "<i4")])
+    if kind == RANKED:
+        return np.dtype([("count", "<i8"), ("ranks", "<i4", (n_candidates,))])
+    raise ValueError(f"Unknown kind of ballots {kind}")
+
+
+class BallotFile:
+    """The contents of a ballot file, as read by `read_ballot_file`.
+
+    `rows` is a read-only structured array over the memory-mapped file, so its fields are views of
+    the file rather than copies, and the file stays mapped for as long as they are referenced.
+    """
+
+    def __init__(self, kind: int, candidate_ids: list, voter_ids: list, rows: np.ndarray):
+        self.kind = kind
+        self.candidate_ids = candidate_ids
+        self.voter_ids = voter_ids
+        self.rows = rows
+
+    def columns(self) -> tuple:
+        """:return: the rows of a pairwise ballot file as columns, as stored by `VoteStore`: the
+        first candidates, the second candidates, the results, and the voters if it has voters."""
+        return tuple(self.rows[field] for field in self.rows.dtype.names)
+
+
+def write_votes(path, candidate_ids, first, second, results, voter_ids=None, voters=None):
+    """Writes encoded pairwise votes to a ballot file at `path`.
+
+    :param candidate_ids: the id of each candidate, in index order
+    :param first: the index of the first candidate of each vote
+    :param second: the index of the second candidate of each vote
+    :param results: the result code of each vote
+    :param voter_ids: the id of each voter, in index order, or None if votes don't have voters
+    :param voters: the index of the voter of each vote, if `voter_ids` is given
+    :raises ValueError: if any id can't be stored in JSON
+    """
+    columns = [first, second, results]
+    kind = PAIRWISE
+    if voter_ids is not None:
+        columns.append(voters)
+        kind = VOTER_TRACKING_PAIRWISE
+    _write(path, kind, candidate_ids, voter_ids or [], row_dtype(kind), columns)
+
+
+def write_rankings(path, candidate_ids, ranks, counts):
+    """Writes ranked ballots to a ballot file at `path`.
+
+    :param candidate_ids: the id of each candidate, in index order
+    :param ranks: a matrix of the position of each candidate on each ballot, as in
+                  `PairwiseTally.add_rankings`
+    :param counts: the number of times each ballot was cast
+    :raises ValueError: if any id can't be stored in JSON
+    """
+    _write(path, RANKED, candidate_ids, [], row_dtype(RANKED, len(candidate_ids)), [counts, ranks])
+
+
+def read_ballot_file(path) -> BallotFile:
+    """Maps the ballot file at `path` into memory, and checks that its rows are well-formed: that
+    the file is as long as its header says, and that every index and result code is in range.
+
+    :raises ValueError: if the file is not a valid ballot file
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < _HEADER.size:
+        raise ValueError(f"{path} is too short to be a ballot file")
+    magic, version, kind, _, table_length, n_rows = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a ballot file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported format version {version}")
+
+    tables = json.loads(bytes(buffer[_HEADER.size : _HEADER.size + table_length]))
+    candidate_ids, voter_ids = tables["candidates"], tables["voters"]
+    dtype = row_dtype(kind, len(candidate_ids))
+    offset = _padded(_HEADER.size + table_length)
+    if len(buffer) != offset + n_rows * dtype.itemsize:
+        raise ValueError(f"{path} should have {n_rows} rows, but is the wrong length")
+
+    rows = np.frombuffer(buffer, dtype=dtype, count=n_rows, offset=offset)
+    ballot_file = BallotFile(kind, candidate_ids, voter_ids, rows)
+    _check_rows(ballot_file)
+    return ballot_file
+
+
+def _check_rows(ballot_file: BallotFile):
+    """:raises ValueError: if any row of `ballot_file` refers to an id or result that isn't there,
+    any ranked ballot was cast less than once, or has a gap in its positions."""
+    rows, n_candidates = ballot_file.rows, len(ballot_file.candidate_ids)
+    if ballot_file.kind == RANKED:
+        in_range = [(rows["ranks"], 0, n_candidates), (rows["count"], 1, np.inf)]
+    else:
+        in_range = [(rows["first"], 0, n_candidates), (rows["second"], 0, n_candidates)]
+        in_range.append((rows["result"], 0, 3))
+        if ballot_file.kind == VOTER_TRACKING_PAIRWISE:
+            in_range.append((rows["voter"], 0, len(ballot_file.voter_ids)))
+
+    for column, low, high in in_range:
+        if column.size and (column.min() < low or column.max() >= high):
+            raise ValueError("Ballot file has rows that refer to ids or results that don't exist")
+
+    if ballot_file.kind == RANKED and n_candidates:
+        # Tied candidates share a position, and the positions of each ballot must count up from 0
+        # without a gap, which the ranking methods rely on
+        for start in range(0, len(rows), WRITE_CHUNK_ROWS):
+            ranks = np.sort(rows["ranks"][start : start + WRITE_CHUNK_ROWS], axis=1)
+            positions = 1 + np.count_nonzero(np.diff(ranks, axis=1), axis=1)
+            if np.any(ranks[:, -1] != positions - 1):
+                raise ValueError("Ballot file has ranked ballots with gaps in their positions")
+
+
+def _write(path, kind, candidate_ids, voter_ids, dtype, columns):
+    tables = json.dumps({"candidates": list(candidate_ids), "voters": list(voter_ids)})
+    if json.loads(tables) != {"candidates": list(candidate_ids), "voters": list(voter_ids)}:
+        raise ValueError("Ids in ballot files must be strings, numbers, booleans, or None")
+    tables = tables.encode("utf-8")
+
+    n_rows = len(columns[0])
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, kind, 0, len(tables), n_rows))
+        f.write(tables)
+        f.write(bytes(_padded(_HEADER.size + len(tables)) - _HEADER.size - len(tables)))
+
+        for start in range(0, n_rows, WRITE_CHUNK_ROWS):
+            rows = np.empty(min(WRITE_CHUNK_ROWS, n_rows - start), dtype=dtype)
+            for field, column in zip(dtype.names, columns):
+                rows[field] = column[start : start + WRITE_CHUNK_ROWS]
+            f.write(rows.tobytes())
+
+
+def _padded(length: int) -> int:
+    return -(-length // _ALIGNMENT) * _ALIGNMENT
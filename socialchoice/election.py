@@ -1,9 +1,12 @@
 import functools
+import time
+from collections.abc import Mapping
 
 import networkx as nx
+import numpy as np
 
-from socialchoice import util
-from socialchoice.ballot import BallotBox
+from socialchoice.ballot import BallotBox, RankedChoiceBallotBox
+from socialchoice.methods import kemeny, pairwise, positional, ranked_pairs, runoff, schulze
 
 
 def optional_score(ranking_method):
@@ -12,7 +15,8 @@ def optional_score(ranking_method):
 
     :param ranking_method: a method on an Election
     :return: the same ranking method, but with a flag `include_score`, which defaults to False. If set to true, the
-    function returns a list of 2-tuples instead of just a ranking
+    function returns a list of 2-tuples instead of just a ranking. Any other keyword arguments are passed to the
+    ranking method.
     """
 
     # This unfortunately has to be defined above Election to be used in Election
@@ -40,8 +44,8 @@ def optional_score(ranking_method):
         return out
 
     @functools.wraps(ranking_method)
-    def wrapped_ranking_method(self, include_score=False, group_ties=False):
-        ranking = ranking_method(self)
+    def wrapped_ranking_method(self, include_score=False, group_ties=False, **kwargs):
+        ranking = ranking_method(self, **kwargs)
 
         if include_score and group_ties:
             return nest_ties(ranking)
@@ -55,6 +59,27 @@ def optional_score(ranking_method):
     return wrapped_ranking_method
 
 
+PAIRWISE_METHODS = (
+    "ranked_pairs",
+    "copeland",
+    "minimax",
+    "schulze",
+    "kemeny",
+    "win_ratio",
+    "win_tie_ratio",
+)
+"""The names of the ranking methods that only need the results of every matchup."""
+ORDERING_METHODS = (
+    "borda_count",
+    "plurality",
+    "anti_plurality",
+    "dowdall",
+    "instant_runoff",
+    "single_transferable_vote",
+)
+"""The names of the ranking methods that need orderings, see `enable_ordering_based_method`."""
+
+
 class Election:
     """Given a ballot box, allows you to run social choice methods on the ballot box."""
 
@@ -64,80 +89,82 @@ class Election:
     ################################################################################################
     # --- Pairwise Methods
 
+    @optional_score
     def ranking_by_ranked_pairs(self) -> list:
-        matchups = self.ballot_box.get_victory_graph()
-
-        g = nx.DiGraph()
-        g.add_nodes_from(matchups.nodes)
+        """Ranks candidates by ranked pairs: edges of the victory graph are locked in from the
+        largest margin to the smallest, skipping any that would create a cycle, and candidates are
+        ranked in an order consistent with the locked edges, scored by the number of candidates
+        they reach through the locked edges. Edges with equal margins are locked in the order
+        their winners, and then their losers, were first seen by the ballot box.
+        """
+        graph = self.ballot_box.get_pairwise_graph()
+        return _ranked_by_score(graph.ids, ranked_pairs.ranked_pairs_scores(graph))
 
-        edges = [(u, v, matchups.get_edge_data(u, v)) for (u, v) in matchups.edges]
-        edges.sort(key=lambda x: x[2]["margin"], reverse=True)
-        for u, v, data in edges:
-            g.add_edge(u, v, **data)
-            try:
-                nx.find_cycle(g)
-                g.remove_edge(u, v)
-            except nx.NetworkXNoCycle:
-                pass
+    def ranked_pairs_graph(self) -> nx.DiGraph:
+        """:return: the graph of the edges locked in by ranked pairs, as described in
+        `ranking_by_ranked_pairs`, with the margin of each edge as its `margin` attribute."""
+        graph = self.ballot_box.get_pairwise_graph()
+        _, winners, losers, margins = ranked_pairs.lock_edges(graph)
 
-        assert nx.is_directed_acyclic_graph(g)
-        return list(nx.topological_sort(g))
+        g = nx.DiGraph()
+        g.add_nodes_from(graph.ids)
+        g.add_edges_from(
+            (graph.ids[u], graph.ids[v], {"margin": margin})
+            for u, v, margin in zip(winners.tolist(), losers.tolist(), margins.tolist())
+        )
+        return g
 
     @optional_score
     def ranking_by_copeland(self) -> list:
-        g = self.ballot_box.get_victory_graph()
-        result = sorted(
-            [(n, g.out_degree(n) - g.in_degree(n)) for n in g.nodes],
-            key=lambda x: x[1],
-            reverse=True,
-        )
-        return result
+        graph = self.ballot_box.get_pairwise_graph()
+        return _ranked_by_score(graph.ids, pairwise.copeland_scores(graph))
 
     @optional_score
     def ranking_by_minimax(self) -> list:
-        g = self.ballot_box.get_matchup_graph()
-        return sorted(
-            g.nodes, key=lambda n: max(g.get_edge_data(u, v)["margin"] for u, v in g.in_edges(n))
-        )
+        """Ranks candidates by their worst defeat, the largest margin any opponent has against
+        them, from the smallest to the largest."""
+        graph = self.ballot_box.get_pairwise_graph()
+        return _ranked_by_score(graph.ids, pairwise.minimax_scores(graph), descending=False)
+
+    @optional_score
+    def ranking_by_schulze(self) -> list:
+        """Ranks candidates by the Schulze method, scoring each by the number of candidates it
+        beats, where a candidate beats another if its strongest path in the victory graph to the
+        other is stronger than the other's strongest path back. The strength of a path is the
+        smallest margin along it."""
+        graph = self.ballot_box.get_pairwise_graph()
+        return _ranked_by_score(graph.ids, schulze.schulze_scores(graph))
+
+    @optional_score
+    def ranking_by_kemeny(self, time_limit=1.0, seed=0) -> list:
+        """Ranks candidates by Kemeny–Young, finding the ranking that agrees with the most pairwise
+        votes, where a ranking agrees with half of each tie. Each candidate is scored by the number
+        of candidates ranked below it.
+
+        The best ranking is found exactly for up to `kemeny.EXACT_MAX_CANDIDATES` candidates.
+        With more candidates, it is approximated by a local search, which returns the best ranking
+        it has found once `time_limit` seconds have passed.
+
+        :param time_limit: the number of seconds the local search may run for
+        :param seed: the seed of the random moves made by the local search
+        """
+        graph = self.ballot_box.get_pairwise_graph()
+        support = kemeny.support_matrix(graph)
+        if len(graph) <= kemeny.EXACT_MAX_CANDIDATES:
+            order = kemeny.exact_ranking(support)
+        else:
+            order = kemeny.local_search_ranking(support, time_limit, seed)
+        return [(graph.ids[i], len(order) - 1 - position) for position, i in enumerate(order)]
 
     @optional_score
     def ranking_by_win_ratio(self) -> list:
-        matchups = self.ballot_box.get_matchups()
-
-        wins_and_ties_vs_losses = {}
-        for candidate in matchups:
-            wins_and_ties_vs_losses[candidate] = [0, 0]
-            for matchup in matchups[candidate]:
-                wins = matchups[candidate][matchup]["wins"]
-                losses = matchups[candidate][matchup]["losses"]
-                wins_and_ties_vs_losses[candidate][0] += wins
-                wins_and_ties_vs_losses[candidate][1] += losses
-
-        ratios = [
-            (candidate, (x[0] / ((x[0] + x[1]) or float("inf"))))
-            for candidate, x in wins_and_ties_vs_losses.items()
-        ]
-        return sorted(ratios, key=lambda x: x[1], reverse=True)
+        graph = self.ballot_box.get_pairwise_graph()
+        return _ranked_by_score(graph.ids, pairwise.win_ratios(graph))
 
     @optional_score
     def ranking_by_win_tie_ratio(self) -> list:
-        matchups = self.ballot_box.get_matchups()
-
-        wins_and_ties_vs_losses = {}
-        for candidate in matchups:
-            wins_and_ties_vs_losses[candidate] = [0, 0]
-            for matchup in matchups[candidate]:
-                wins = matchups[candidate][matchup]["wins"]
-                ties = matchups[candidate][matchup]["ties"]
-                losses = matchups[candidate][matchup]["losses"]
-                wins_and_ties_vs_losses[candidate][0] += wins + ties
-                wins_and_ties_vs_losses[candidate][1] += losses
-
-        ratios = [
-            (candidate, (x[0] / ((x[0] + x[1]) or float("inf"))))
-            for candidate, x in wins_and_ties_vs_losses.items()
-        ]
-        return sorted(ratios, key=lambda x: x[1], reverse=True)
+        graph = self.ballot_box.get_pairwise_graph()
+        return _ranked_by_score(graph.ids, pairwise.win_ratios(graph, ties_as_wins=True))
 
     ################################################################################################
     # Ordering based methods
@@ -147,30 +174,132 @@ class Election:
 
     @optional_score
     def ranking_by_borda_count(self) -> list:
-        orderings = self.ballot_box.get_orderings()
-        if orderings is None:
+        """Ranks candidates by Borda count, where each candidate scores a point on each ballot for
+        every candidate ranked below it. Tied candidates score nothing for each other."""
+        return self._ranking_by_positional_rule("borda", ties="bottom")
+
+    @optional_score
+    def ranking_by_plurality(self, ties="average") -> list:
+        """Ranks candidates by the number of ballots that rank them first.
+
+        :param ties: how candidates tied on a ballot are scored, as in `positional.TIE_RULES`. By
+        default, candidates tied for first share the point.
+        """
+        return self._ranking_by_positional_rule("plurality", ties)
+
+    @optional_score
+    def ranking_by_anti_plurality(self, ties="average") -> list:
+        """Ranks candidates by the number of ballots that don't rank them last.
+
+        :param ties: how candidates tied on a ballot are scored, as in `positional.TIE_RULES`
+        """
+        return self._ranking_by_positional_rule("anti_plurality", ties)
+
+    @optional_score
+    def ranking_by_dowdall(self) -> list:
+        """Ranks candidates by the Dowdall system, where each candidate scores 1 / p points on each
+        ballot that ranks it in position p, counting from 1. Tied candidates share the average of
+        the points of the positions they share."""
+        return self._ranking_by_positional_rule("dowdall", ties="average")
+
+    @optional_score
+    def ranking_by_positional_scores(self, points, ties="average") -> list:
+        """Ranks candidates by a custom positional scoring rule.
+
+        :param points: the points for each position on a ballot, from first to last. Positions past
+        the end of `points` score nothing.
+        :param ties: how candidates tied on a ballot are scored, as in `positional.TIE_RULES`
+        """
+        ballot_box = self._ranked_choice_ballot_box("a positional scoring rule")
+        scores = positional.positional_scores(ballot_box.ranks, ballot_box.counts, points, ties)
+        return _ranked_by_score(ballot_box.candidate_ids, scores)
+
+    def _ranking_by_positional_rule(self, rule, ties) -> list:
+        ballot_box = self._ranked_choice_ballot_box(rule.replace("_", "-"))
+        points = positional.score_vector(rule, len(ballot_box.candidate_ids))
+        scores = positional.positional_scores(ballot_box.ranks, ballot_box.counts, points, ties)
+        return _ranked_by_score(ballot_box.candidate_ids, scores)
+
+    @optional_score
+    def ranking_by_instant_runoff(self) -> list:
+        """Ranks candidates by instant-runoff voting, eliminating the candidate with the fewest
+        first preferences among the remaining candidates until one is left, and ranking candidates
+        in the reverse of the order they were eliminated. Each candidate is scored by its votes in
+        the last round it was in. A ballot with a tie for its first preference counts equally
+        towards each tied candidate.
+        """
+        ballot_box = self._ranked_choice_ballot_box("instant-runoff voting")
+        ranking = runoff.instant_runoff(ballot_box.ranks, ballot_box.counts)
+        return [(ballot_box.candidate_ids[i], votes) for i, votes in ranking]
+
+    @optional_score
+    def ranking_by_single_transferable_vote(self, seats=1) -> list:
+        """Elects `seats` candidates by the single transferable vote, as described in
+        `runoff.single_transferable_vote`, returning the elected candidates in the order they were
+        elected, each scored by its votes when it was elected.
+
+        :param seats: the number of candidates to elect
+        """
+        ballot_box = self._ranked_choice_ballot_box("the single transferable vote")
+        elected = runoff.single_transferable_vote(ballot_box.ranks, ballot_box.counts, seats)
+        return [(ballot_box.candidate_ids[i], votes) for i, votes in elected]
+
+    def _ranked_choice_ballot_box(self, method) -> RankedChoiceBallotBox:
+        """:return: the ranked ballots of this election, or those induced by
+        `enable_ordering_based_method`
+        :raises ValueError: if the ballot box has no ranked ballots"""
+        ordering_ballot_box = self._ranked_ballots()
+        if ordering_ballot_box is None:
             raise ValueError(
                 f"Could not retrieve orderings from the ballot box {self.ballot_box}.\n"
                 f"Likely, the ballot box was a PairwiseBallotBox. \n"
-                f"Use enable_ordering_based_methods to allow this Election to run Borda Count."
+                f"Use enable_ordering_based_methods to allow this Election to run {method}."
             )
+        return ordering_ballot_box
 
-        candidates = util.candidates_in_ranked_choice_ballots(orderings)
-        # Count the number of candidates each candidate was above, over all ballots
-        candidate_wins = {c: 0 for c in candidates}
-
-        for ordering in orderings:
-            if len(ordering) == 1:
-                continue
+    def _ranked_ballots(self):
+        if isinstance(self.ballot_box, RankedChoiceBallotBox):
+            return self.ballot_box
+        return getattr(self.ballot_box, "ordering_ballot_box", None)
 
-            candidates_so_far = ordering[0]
-            for more_candidates in ordering[1:]:
-                for candidate_already in candidates_so_far:
-                    candidate_wins[candidate_already] += len(more_candidates)
-                candidates_so_far |= more_candidates
-
-        result = sorted(candidate_wins.items(), key=lambda i: i[1], reverse=True)
-        return result
+    ################################################################################################
+    # Running many methods at once
+
+    def rank_all(self, methods=None) -> tuple:
+        """Runs several ranking methods on this election, each with `include_score=True`.
+
+        The ballots are tallied into a pairwise graph once, before any method runs, and every
+        method reads that same graph, along with its edges and margins, which are also only
+        computed once.
+
+        :param methods: the names of the methods to run, like "copeland" for
+        `ranking_by_copeland`, or a mapping from names to the keyword arguments to run each with,
+        like `{"single_transferable_vote": {"seats": 3}}`. Defaults to `PAIRWISE_METHODS`, and also
+        `ORDERING_METHODS` if this election has orderings.
+        :return: a dictionary from each method's name to its ranking, with scores, and a dictionary
+        from each method's name to the number of seconds it took. The time taken to tally the
+        pairwise graph is under "pairwise_graph".
+        :raises ValueError: if a method isn't one of `PAIRWISE_METHODS` or `ORDERING_METHODS`
+        """
+        if methods is None:
+            has_orderings = self._ranked_ballots() is not None
+            methods = PAIRWISE_METHODS + (ORDERING_METHODS if has_orderings else ())
+        if not isinstance(methods, Mapping):
+            methods = {name: {} for name in methods}
+        for name in methods:
+            if name not in PAIRWISE_METHODS + ORDERING_METHODS:
+                raise ValueError(f"Unknown ranking method {name!r}")
+
+        start = time.perf_counter()
+        self.ballot_box.get_pairwise_graph()
+        timings = {"pairwise_graph": time.perf_counter() - start}
+
+        rankings = {}
+        for name, options in methods.items():
+            start = time.perf_counter()
+            rankings[name] = getattr(self, f"ranking_by_{name}")(include_score=True, **options)
+            timings[name] = time.perf_counter() - start
+        return rankings, timings
 
     ################################################################################################
     # Adding support for ordering based methods
@@ -188,3 +317,10 @@ class Election:
         self.ballot_box.enable_ordering_based_methods(
             intransitivity_resolver, incompleteness_resolver
         )
+
+
+def _ranked_by_score(ids: list, scores: np.ndarray, descending=True) -> list:
+    """:return: a list of (candidate, score) tuples, sorted by score, where `scores[i]` is the score
+    of `ids[i]`. Candidates with equal scores stay in the order the ballot box first saw them."""
+    order = np.argsort(-scores if descending else scores, kind="stable")
+    return list(zip(map(ids.__getitem__, order.tolist()), scores[order].tolist()))
@@ -0,0 +1,115 @@
+"""
+A lightweight graph of the results of every matchup, stored as adjacency matrices.
+
+Building a networkx graph of the matchups takes a Python dictionary of attributes for every edge,
+so the ranking methods and resolvers work on a `PairwiseGraph` instead, which keeps the matrices
+of a `PairwiseTally` indexed by candidate index. It is converted to a networkx graph only when one
+is asked for, with `to_networkx`.
+
+As the graph is a snapshot, the edges and margins derived from its matrices are computed once, the
+first time they are asked for, and shared by every ranking method run on the graph.
+"""
+
+import networkx as nx
+import numpy as np
+
+from socialchoice.tally import PairwiseTally, results_between
+
+
+class PairwiseGraph:
+    """A read-only snapshot of the wins, losses, and ties between every pair of candidates.
+
+    The matchup graph has an edge from `i` to `j` for every pair of candidates that has faced each
+    other, and the victory graph has an edge from `i` to `j` whenever `i` beat `j` more often than
+    `j` beat `i`, as described in `BallotBox.get_matchup_graph` and `BallotBox.get_victory_graph`.
+    """
+
+    def __init__(self, tally: PairwiseTally):
+        self.ids = list(tally.ids)
+        self.index = dict(tally.index)
+        self.sparse = tally.sparse
+        self.wins = tally.wins.copy()
+        """A C×C matrix, where entry `[i, j]` is the number of times `i` beat `j`. This is a
+        `scipy.sparse.csr_array` if the tally was sparse."""
+        self.ties = tally.ties.copy()
+        """A C×C matrix, where entry `[i, j]` is the number of times `i` tied `j`."""
+        if not self.sparse:
+            self.wins.flags.writeable = self.ties.flags.writeable = False
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def losses(self):
+        """A C×C matrix, where entry `[i, j]` is the number of times `i` lost to `j`."""
+        return self.wins.T
+
+    def matchup_edges(self) -> tuple:
+        """:return: the edges of the matchup graph, as a read-only array of sources and of
+        targets."""
+        return self._derive(
+            "matchup_edges", lambda: (self.wins + self.wins.T + self.ties).nonzero()
+        )
+
+    def victory_edges(self) -> tuple:
+        """:return: the edges of the victory graph, as a read-only array of winners and of
+        losers."""
+        # Both edges of a matchup have the same number of total votes, so comparing wins is the
+        # same as comparing margins. Perfect ties have no edge in either direction.
+        return self._derive("victory_edges", lambda: (self.wins > self.wins.T).nonzero())
+
+    def matchup_margins(self) -> np.ndarray:
+        """:return: the margin of each edge of the matchup graph, in the order of `matchup_edges`,
+        as a read-only array."""
+        return self._derive("matchup_margins", lambda: self.margins(*self.matchup_edges()))
+
+    def victory_margins(self) -> np.ndarray:
+        """:return: the margin of each edge of the victory graph, in the order of `victory_edges`,
+        as a read-only array."""
+        return self._derive("victory_margins", lambda: self.margins(*self.victory_edges()))
+
+    def _derive(self, name, compute):
+        """:return: the value of `compute()`, which is only called the first time `name` is asked
+        for. Its arrays are made read-only, as they are shared."""
+        if name not in self._derived:
+            value = compute()
+            for array in value if isinstance(value, tuple) else (value,):
+                array.flags.writeable = False
+            self._derived[name] = value
+        return self._derived[name]
+
+    def results(self, first, second) -> tuple:
+        """:return: the number of wins, losses, and ties of each candidate index in `first` against
+        the candidate index at the same position in `second`, as three arrays."""
+        return results_between(self.wins, self.ties, first, second)
+
+    def margins(self, first, second) -> np.ndarray:
+        """:return: the ratio of wins to all votes of each candidate index in `first` against the
+        candidate index at the same position in `second`, which must have faced each other."""
+        wins, losses, ties = self.results(first, second)
+        return wins / (wins + losses + ties)
+
+    def edge_margins(self) -> dict:
+        """:return: a mapping from each (candidate, opponent) edge of the matchup graph to the
+        margin of that matchup, the ratio of the candidate's wins to all votes."""
+        first, second = self.matchup_edges()
+        edges = zip(
+            map(self.ids.__getitem__, first.tolist()), map(self.ids.__getitem__, second.tolist())
+        )
+        return dict(zip(edges, self.matchup_margins().tolist()))
+
+    def to_networkx(self, victory=False) -> nx.DiGraph:
+        """:return: the victory graph if `victory` is True, otherwise the matchup graph, as a new
+        networkx graph with the edge attributes described in `BallotBox.get_matchup_graph`."""
+        first, second = self.victory_edges() if victory else self.matchup_edges()
+        wins, losses, ties = (counts.tolist() for counts in self.results(first, second))
+        ids = self.ids
+
+        g = nx.DiGraph()
+        g.add_nodes_from(ids)
+        g.add_edges_from(
+            (ids[u], ids[v], {"wins": w, "losses": l, "ties": t, "margin": w / (w + l + t)})
+            for u, v, w, l, t in zip(first.tolist(), second.tolist(), wins, losses, ties)
+        )
+        return g
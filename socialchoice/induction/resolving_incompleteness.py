@@ -1,52 +1,56 @@
 """Functions that will add missing items into a partial ranking. All functions have the following signature:
 Input is a (possibly) partial, but transitive win-graph, and a set of nodes to insert into that win-graph.
 The output is a complete, fully connected, transitive win-graph.
+
+Every resolver made by the IncompletenessResolverFactory has a `deterministic` attribute, which is
+True if it always completes the same win-graph the same way.
 """
+
 import random
 from functools import partial
 
 import networkx as nx
+import numpy as np
 
 from socialchoice import util
-from socialchoice.ballot import BallotBox, PairwiseBallotBox
-
-
-# TODO this file has duplicate code in each of the functions, converting candidates to `to_add`
-#      and also roundtripping to rankings
+from socialchoice.ballot import BallotBox
+from socialchoice.graph import PairwiseGraph
+from socialchoice.induction.acyclic_win_graph import AcyclicWinGraph
+from socialchoice.tally import PairwiseTally
 
 
 class IncompletenessResolverFactory:
     def __init__(self, ballot_box: BallotBox):
         self.pairwise_ballots = ballot_box
         self.candidates = ballot_box.get_candidates()
-        wg = ballot_box.get_matchup_graph()
-        self.edge_to_weight = {e: wg.get_edge_data(*e)["margin"] for e in wg.edges}
+        self.edge_to_weight = ballot_box.get_pairwise_graph().edge_margins()
 
     def make_place_randomly(self):
-        return self._partial_with_name(place_randomly)
+        return self._partial_with_name(place_randomly, deterministic=False)
 
     def make_add_all_at_beginning(self):
-        return self._partial_with_name(add_all_at_beginning)
+        return self._partial_with_name(add_all_at_beginning, deterministic=True)
 
     def make_add_all_at_end(self):
-        return self._partial_with_name(add_all_at_end)
+        return self._partial_with_name(add_all_at_end, deterministic=True)
 
     def make_add_random_edges(self):
-        return self._partial_with_name(add_random_edges)
+        return self._partial_with_name(add_random_edges, deterministic=False)
 
     def make_add_edges_by_win_ratio(self):
         return make_add_edges_by_win_ratio(self.edge_to_weight, self.candidates)
 
-    def _partial_with_name(self, f):
+    def _partial_with_name(self, f, deterministic):
         func = partial(f, candidates=self.candidates)
         func.__name__ = f.__name__
+        func.deterministic = deterministic
         return func
 
 
 def place_randomly(win_graph: nx.DiGraph, candidates: set) -> nx.DiGraph:
     """Inserts each candidate to a random place in the ranking."""
     ranking = _graph_to_ranking(win_graph)
-    to_add = candidates.difference(set(win_graph.nodes))
+    to_add = _missing(win_graph, candidates)
     for item in to_add:
         ranking.insert(random.randrange(0, len(ranking) + 1), item)
     return _ranking_to_graph(ranking)
@@ -54,7 +58,7 @@ def place_randomly(win_graph: nx.DiGraph, candidates: set) -> nx.DiGraph:
 
 def add_all_at_beginning(win_graph: nx.DiGraph, candidates: set) -> nx.DiGraph:
     """Adds all candidates as winning against everyone."""
-    to_add = candidates.difference(set(win_graph.nodes))
+    to_add = _missing(win_graph, candidates)
     ranking = _graph_to_ranking(win_graph)
     ranking.insert(0, to_add)
     return _ranking_to_graph(ranking)
@@ -62,40 +66,44 @@ def add_all_at_beginning(win_graph: nx.DiGraph, candidates: set) -> nx.DiGraph:
 
 def add_all_at_end(win_graph: nx.DiGraph, candidates: set) -> nx.DiGraph:
     """Adds all candidates to the end of the ranking."""
-    to_add = candidates.difference(set(win_graph.nodes))
+    to_add = _missing(win_graph, candidates)
     ranking = _graph_to_ranking(win_graph)
     ranking.append(to_add)
     return _ranking_to_graph(ranking)
 
 
 def add_random_edges(win_graph: nx.DiGraph, candidates: set) -> nx.DiGraph:
-    """Chooses a random pair of nodes that aren't connected to each other, and then connects them,
-    never adding edges that would result in a cycle, until the graph is a complete win-graph.
+    """Completes the win-graph into a random ranking of all the candidates, keeping every edge
+    already in it.
+
+    The ranking is a random topological sort of the win-graph, by Kahn's algorithm: the next
+    candidate is chosen uniformly at random from the candidates left to rank that no other candidate
+    left to rank beats, where candidates missing from the win-graph beat and are beaten by nobody.
+    So each ranking comes out with the product, over its positions, of one over the number of
+    candidates that could have been placed there. Every ranking that keeps the edges of the
+    win-graph can come out, but not equally often: if `a` beats `b`, and `c` is missing, then
+    `c, a, b` comes out half of the time, and `a, b, c` and `a, c, b` a quarter of the time each.
+
+    This takes time linear in the number of edges.
     """
-    to_add = candidates.difference(set(win_graph.nodes))
-    win_graph = win_graph.copy()
-    candidates = set(win_graph.nodes).union(to_add)
-    edge_list = []
-    for u in candidates:
-        for v in candidates:
-            if u != v:
-                edge_list.append((u, v))
-
-    random.shuffle(edge_list)
-
-    # Existing edges don't have to be checked
-    for edge in win_graph.edges:
-        edge_list.remove(edge)
-
-    for c1, c2 in edge_list:
-        try:
-            win_graph.add_edge(c1, c2)
-            nx.find_cycle(win_graph)
-            win_graph.remove_edge(c1, c2)
-        except nx.NetworkXNoCycle:
-            pass
+    to_add = _missing(win_graph, candidates)
+    beaten_by = dict(win_graph.in_degree)
+    beaten_by.update(dict.fromkeys(to_add, 0))
+
+    unbeaten = [candidate for candidate, count in beaten_by.items() if count == 0]
+    ranking = []
+    while unbeaten:
+        # Swap a random unbeaten candidate to the end, to take it in constant time
+        i = random.randrange(0, len(unbeaten))
+        unbeaten[i], unbeaten[-1] = unbeaten[-1], unbeaten[i]
+        candidate = unbeaten.pop()
+        ranking.append(candidate)
+        for loser in win_graph.successors(candidate) if candidate in win_graph else ():
+            beaten_by[loser] -= 1
+            if beaten_by[loser] == 0:
+                unbeaten.append(loser)
 
-    return win_graph
+    return _ranking_to_graph(ranking)
 
 
 def make_add_edges_by_win_ratio(edges_to_win_ratio, candidates):
@@ -112,6 +120,7 @@ def make_add_edges_by_win_ratio(edges_to_win_ratio, candidates):
     )
     # Partial function instead of local definition so that result can be pickled
     func = partial(add_edges_by_win_ratio, edges_by_win_ratio, candidates=candidates)
+    func.deterministic = True
     return func
 
 
@@ -120,24 +129,30 @@ def add_edges_by_win_ratio(
 ) -> nx.DiGraph:
     """Adds edges into the win-graph in order of the win ratios of those matchups in the entire voting set,
     only adding edges that will not create cycles."""
-    to_add = candidates.difference(set(win_graph.nodes))
+    to_add = _missing(win_graph, candidates)
+    acyclic = AcyclicWinGraph(win_graph)
     for (c1, c2) in edges_by_win_ratio:
-        try:
-            win_graph.add_edge(c1, c2)
-            nx.find_cycle(win_graph)
-            win_graph.remove_edge(c1, c2)
-        except nx.NetworkXNoCycle:
-            pass
+        acyclic.add_edge(c1, c2)
 
     assert all(candidate in win_graph.nodes for candidate in to_add)
     return win_graph
 
 
+def _missing(win_graph: nx.DiGraph, candidates: set) -> set:
+    """:return: the candidates that aren't in the win-graph yet."""
+    return candidates.difference(win_graph.nodes)
+
+
 def _graph_to_ranking(g: nx.DiGraph) -> list:
     return list(nx.topological_sort(g))
 
 
 def _ranking_to_graph(r: list) -> nx.DiGraph:
-    ballots = util.ranking_to_pairwise_ballots(r)
-    candidates = util.candidates_in_ranked_choice_ballot(r)
-    return PairwiseBallotBox(ballots, candidates).get_victory_graph()
+    # Tally the ranking straight from the position of each candidate, rather than converting it to
+    # its O(C²) pairwise votes
+    tally = PairwiseTally(util.candidates_in_ranked_choice_ballot(r))
+    ranks = np.zeros((1, len(tally)), dtype=np.intp)
+    for position, candidates in enumerate(util.ranking_with_all_sets(r)):
+        ranks[0, [tally.index[c] for c in candidates]] = position
+    tally.add_rankings(ranks)
+    return PairwiseGraph(tally).to_networkx(victory=True)
@@ -4,24 +4,29 @@ Input is a intransitive win-graph, output is a transitive win-graph.
 
 The easiest way to generate intransitivity resolvers is with the IntransitivityResolverFactory.
 You construct it with the set of pairwise votes it will be resolving vote sets from, and then
-can use its methods to generate intransitivity resolvers.
+can use its methods to generate intransitivity resolvers. Every resolver it makes has a
+`deterministic` attribute, which is True if it always resolves the same votes the same way, so that
+its results can be reused for repeated vote sets.
 """
+
 import random
 from functools import partial
 
 import networkx as nx
 
 from socialchoice.ballot import BallotBox, PairwiseBallotBox
+from socialchoice.induction.acyclic_win_graph import AcyclicWinGraph
 
 
 class IntransitivityResolverFactory:
     def __init__(self, ballot_box: BallotBox):
         self.pairwise_ballots = ballot_box
-        wg = ballot_box.get_matchup_graph()
-        self.edge_to_win_ratio = {e: wg.get_edge_data(*e)["margin"] for e in wg.edges}
+        self.edge_to_win_ratio = ballot_box.get_pairwise_graph().edge_margins()
 
     def make_break_random_link(self):
-        return partial(break_random_link)
+        func = partial(break_random_link)
+        func.deterministic = False
+        return func
 
     def make_break_weakest_link(self):
         return make_break_weakest_link(self.edge_to_win_ratio)
@@ -30,17 +35,15 @@ class IntransitivityResolverFactory:
         return make_add_edges_in_order(self.edge_to_win_ratio)
 
 
+def _victory_graph(vote_set) -> nx.DiGraph:
+    """:return: a new, modifiable victory graph of the given votes."""
+    return PairwiseBallotBox(vote_set).get_pairwise_graph().to_networkx(victory=True)
+
+
 def break_random_link(vote_set):
     """While there is a cycle, breaks the cycle by removing a random edge in it."""
-    win_graph = PairwiseBallotBox(vote_set).get_victory_graph()
-
-    # Keep iterating until there are no cycles remaining
-    while True:
-        try:
-            cycle = nx.find_cycle(win_graph)
-            win_graph.remove_edge(*cycle[random.randrange(0, len(cycle))])
-        except nx.NetworkXNoCycle:
-            break
+    win_graph = _victory_graph(vote_set)
+    _break_cycles(win_graph, lambda cycle: cycle[random.randrange(0, len(cycle))])
 
     assert nx.is_directed_acyclic_graph(win_graph)
     return win_graph
@@ -55,31 +58,75 @@ def make_break_weakest_link(edge_to_win_ratio):
     """
     # Partial function instead of local definition so that result can be pickled
     func = partial(break_weakest_link, edge_to_win_ratio)
+    func.deterministic = True
     return func
 
 
 def break_weakest_link(edge_to_win_ratio, vote_set):
     """While there is a cycle, breaks the cycle by removing the weakest edge in it."""
-    win_graph = PairwiseBallotBox(vote_set).get_victory_graph()
-
-    def weakest(edges):
-        return min(edges, key=lambda e: edge_to_win_ratio[e])
-
-    # Keep iterating until there are no cycles remaining
-    while True:
-        try:
-            cycle = nx.find_cycle(win_graph)
-            win_graph.remove_edge(*weakest(cycle))
-        except nx.NetworkXNoCycle:
-            break
+    win_graph = _victory_graph(vote_set)
+    _break_cycles(win_graph, lambda cycle: min(cycle, key=lambda e: edge_to_win_ratio[e]))
 
     assert nx.is_directed_acyclic_graph(win_graph)
     return win_graph
 
 
+def _break_cycles(win_graph: nx.DiGraph, choose):
+    """While there is a cycle, breaks the first cycle `nx.find_cycle` would find by removing the
+    edge of it picked by `choose`, given the cycle's edges in the order `nx.find_cycle` lists them.
+
+    `nx.find_cycle` does a depth-first search, and stops at the first edge back to a candidate on
+    the search path. Searching again from scratch after removing an edge from that cycle would
+    retrace the same steps up to the removed edge, so the search resumes from there instead. If
+    the edge was on the search path, the candidates reached since its loser was reached are
+    forgotten, to be searched again. So the same cycles are found, and the same edges removed, as
+    by searching from scratch each time, but the candidates searched without finding a cycle,
+    like every candidate outside of a strongly connected component, are only searched once.
+    """
+    unvisited, on_path, finished = 0, 1, 2
+    state = dict.fromkeys(win_graph, unvisited)
+    reached = []
+    reached_at = {}
+    path, next_edges = [], []
+
+    def reach(candidate):
+        state[candidate] = on_path
+        reached_at[candidate] = len(reached)
+        reached.append(candidate)
+        path.append(candidate)
+        next_edges.append(iter(list(win_graph.successors(candidate))))
+
+    for root in win_graph:
+        if state[root] != unvisited:
+            continue
+        reach(root)
+        while path:
+            winner = path[-1]
+            loser = next(next_edges[-1], None)
+            if loser is None:
+                state[winner] = finished
+                path.pop()
+                next_edges.pop()
+            elif state[loser] == unvisited:
+                reach(loser)
+            elif state[loser] == on_path:
+                start = path.index(loser)
+                cycle = list(zip(path[start:], path[start + 1 :])) + [(winner, loser)]
+                removed = choose(cycle)
+                win_graph.remove_edge(*removed)
+                if removed != (winner, loser):
+                    # The search path ran through the removed edge, so go back to its winner
+                    end = path.index(removed[1])
+                    for candidate in reached[reached_at[removed[1]] :]:
+                        state[candidate] = unvisited
+                    del reached[reached_at[removed[1]] :]
+                    del path[end:], next_edges[end:]
+
+
 def make_add_edges_in_order(edge_to_win_ratio):
     # Partial function instead of local definition so that result can be pickled
     func = partial(add_edges_in_order, edge_to_win_ratio)
+    func.deterministic = True
     return func
 
 
@@ -88,15 +135,9 @@ def add_edges_in_order(edge_to_win_ratio, vote_set):
     win_graph = nx.DiGraph()
     ordered_votes = sorted(vote_set, key=lambda e: edge_to_win_ratio[(e[0], e[1])], reverse=True)
 
+    acyclic = AcyclicWinGraph(win_graph)
     for c1, c2, result in ordered_votes:
-        try:
-            win_graph.add_edge(c1, c2)
-            cycles = nx.find_cycle(win_graph)
-            # If we hit this line, a NoCycle exception was not thrown, therefore there is a cycle and we have to
-            # remove an edge from it
-            win_graph.remove_edge(c1, c2)
-        except nx.NetworkXNoCycle:
-            continue
+        acyclic.add_edge(c1, c2)
 
     assert nx.is_directed_acyclic_graph(win_graph)
     return win_graph
@@ -16,3 +16,35 @@ def vote_induction(pairwise_votes, intransitivity_resolver, incompleteness_resol
     transitive_votes = intransitivity_resolver(pairwise_votes)
     complete_transitive_votes = incompleteness_resolver(transitive_votes)
     return list(nx.topological_sort(complete_transitive_votes))
+
+
+def is_deterministic(resolver) -> bool:
+    """:return: whether `resolver` always resolves the same votes the same way, as marked by its
+    `deterministic` attribute. The resolver factories mark every resolver they make, and unmarked
+    resolvers are assumed to be random."""
+    return getattr(resolver, "deterministic", False)
+
+
+def induce_orderings(vote_sets, intransitivity_resolver, incompleteness_resolver) -> list:
+    """
+    Converts each of a sequence of sets of pairwise votes into a ranking, as `vote_induction` does.
+
+    If both resolvers are deterministic, each distinct vote set is only resolved once, and every
+    vote set with the same votes in the same order shares its ranking. Otherwise, every vote set is
+    resolved separately, so random resolvers choose independently for each.
+
+    :param vote_sets: an iterable of sets of pairwise votes, as lists of votes
+    :return: a list of the ranking of each vote set
+    """
+    resolvers = intransitivity_resolver, incompleteness_resolver
+    if not all(is_deterministic(resolver) for resolver in resolvers):
+        return [vote_induction(vote_set, *resolvers) for vote_set in vote_sets]
+
+    rankings = {}
+    induced = []
+    for vote_set in vote_sets:
+        key = tuple(tuple(vote) for vote in vote_set)
+        if key not in rankings:
+            rankings[key] = vote_induction(vote_set, *resolvers)
+        induced.append(rankings[key])
+    return induced
@@ -0,0 +1,226 @@
+"""
+Bulk loaders for votes exported as CSV or JSON lines.
+
+Files are read `chunk_size` rows at a time. Each chunk is parsed in bulk, by a single CSV reader or
+a single `json.loads` call over the whole chunk. Pairwise votes are then split into columns that
+are encoded straight to candidate indices and counted, so no tuple is built for each vote. Ranked
+ballots are counted as they are read, so only the distinct ballots are kept. Blank lines are
+skipped.
+
+Parsing a chunk allocates a container for every row, none of which can form a reference cycle, so
+the cyclic garbage collector is paused while loading. Otherwise, it would repeatedly scan every
+row of every chunk, which takes as long as the parsing itself. The pause applies to the whole
+process, including other threads, and the collector is left as it was found once loading ends.
+
+Every loader takes a `report` callback, which is called after each chunk with the number of rows
+loaded so far and the throughput so far, in rows per second.
+"""
+
+import csv
+import gc
+import json
+import time
+from array import array
+from contextlib import contextmanager
+from itertools import islice
+
+from socialchoice.ballot import (
+    DEFAULT_CHUNK_SIZE,
+    PairwiseBallotBox,
+    VoterTrackingPairwiseBallotBox,
+    RankedChoiceBallotBox,
+    InvalidBallotDataException,
+    _count_ranked_ballots,
+)
+
+__all__ = ["load_pairwise_csv", "load_pairwise_jsonl", "load_ranked_csv", "load_ranked_jsonl"]
+
+
+def load_pairwise_csv(
+    path,
+    candidates=None,
+    voters=False,
+    header=False,
+    keep_votes=True,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    report=None,
+):
+    """Loads pairwise votes from a CSV file, where each row is a vote of the form
+    `first,second,result`, or `first,second,result,voter` if `voters` is True. Ids are loaded as
+    strings.
+
+    :param path: the path of the CSV file
+    :param candidates: the candidates being voted on, or None to infer them from the votes
+    :param voters: whether each row has a fourth column, the voter who placed the vote
+    :param header: whether the first row is a header, rather than a vote
+    :param keep_votes: whether to keep the votes, as in `PairwiseBallotBox`
+    :param chunk_size: the number of rows to parse and count at a time
+    :param report: None, or a function that is called after each chunk with the number of rows
+    loaded so far and the number of rows loaded per second
+    :return: a VoterTrackingPairwiseBallotBox if `voters` is True, otherwise a PairwiseBallotBox
+    :raises InvalidBallotDataException: if any row is not a valid vote
+    """
+    with open(path, newline="") as f, _gc_paused():
+        rows = filter(None, csv.reader(f))
+        if header:
+            next(rows, None)
+        return _load_pairwise(_chunks(rows, chunk_size), candidates, voters, keep_votes, report)
+
+
+def load_pairwise_jsonl(
+    path, candidates=None, voters=False, keep_votes=True, chunk_size=DEFAULT_CHUNK_SIZE, report=None
+):
+    """Loads pairwise votes from a JSON lines file, where each line is a vote as a JSON array, like
+    `["a", "b", "win"]`, or `["a", "b", "win", "voter"]` if `voters` is True.
+
+    See `load_pairwise_csv` for the parameters.
+    """
+    with open(path) as f, _gc_paused():
+        return _load_pairwise(
+            _json_chunks(f, chunk_size, path), candidates, voters, keep_votes, report
+        )
+
+
+def load_ranked_csv(
+    path,
+    candidates=None,
+    header=False,
+    tie_separator="|",
+    trusted=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    report=None,
+) -> RankedChoiceBallotBox:
+    """Loads ranked ballots from a CSV file, where each row is a ballot listing the candidates from
+    first to last. A cell with several candidates separated by `tie_separator` is a tie between
+    them, so `1,2|3,4` ranks 1 first, 2 and 3 tied for second, and then 4. Ids are loaded as
+    strings.
+
+    :param path: the path of the CSV file
+    :param candidates: the candidates being voted on, or None to infer them from the ballots
+    :param header: whether the first row is a header, rather than a ballot
+    :param tie_separator: the separator between tied candidates in a cell
+    :param trusted: skip validating the ballots, as in `RankedChoiceBallotBox`
+    :param chunk_size: the number of rows to parse and count at a time
+    :param report: None, or a function that is called after each chunk with the number of rows
+    loaded so far and the number of rows loaded per second
+    :raises InvalidBallotDataException: if any row is not a valid ballot
+    """
+
+    def with_ties(ballots):
+        for ballot in ballots:
+            if any(tie_separator in position for position in ballot):
+                ballot = [
+                    set(position.split(tie_separator)) if tie_separator in position else position
+                    for position in ballot
+                ]
+            yield ballot
+
+    with open(path, newline="") as f, _gc_paused():
+        rows = filter(None, csv.reader(f))
+        if header:
+            next(rows, None)
+        chunks = (list(with_ties(chunk)) for chunk in _chunks(rows, chunk_size))
+        return _load_ranked(chunks, candidates, trusted, report)
+
+
+def load_ranked_jsonl(
+    path, candidates=None, trusted=False, chunk_size=DEFAULT_CHUNK_SIZE, report=None
+) -> RankedChoiceBallotBox:
+    """Loads ranked ballots from a JSON lines file, where each line is a ballot as a JSON array,
+    and ties are nested arrays, so `[1, [2, 3], 4]` ranks 1 first, 2 and 3 tied for second, and
+    then 4.
+
+    See `load_ranked_csv` for the parameters.
+    """
+
+    def with_ties(ballots):
+        for ballot in ballots:
+            if isinstance(ballot, list) and any(isinstance(position, list) for position in ballot):
+                ballot = [set(p) if isinstance(p, list) else p for p in ballot]
+            yield ballot
+
+    with open(path) as f, _gc_paused():
+        chunks = (list(with_ties(chunk)) for chunk in _json_chunks(f, chunk_size, path))
+        return _load_ranked(chunks, candidates, trusted, report)
+
+
+def _load_pairwise(chunks, candidates, voters, keep_votes, report):
+    if voters:
+        ballot_box = VoterTrackingPairwiseBallotBox([], candidates, keep_votes=keep_votes)
+    else:
+        ballot_box = PairwiseBallotBox([], candidates, keep_votes=keep_votes)
+    width = 4 if voters else 3
+
+    for rows in _reporting(chunks, report):
+        if set(map(len, rows)) != {width}:
+            row = next(row for row in rows if len(row) != width)
+            raise InvalidBallotDataException(f"Expected a vote of length {width}, got {row}")
+        ballot_box.add_columns(*zip(*rows))
+    return ballot_box
+
+
+def _load_ranked(chunks, candidates, trusted, report) -> RankedChoiceBallotBox:
+    distinct, rows = {}, array("q")
+    for ballots in _reporting(chunks, report):
+        _count_ranked_ballots(ballots, distinct, rows, trusted)
+    return RankedChoiceBallotBox._from_counts(distinct, rows, candidates, trusted)
+
+
+def _chunks(rows, chunk_size):
+    """:return: an iterator of lists of `chunk_size` rows, until the rows run out."""
+    return iter(lambda: list(islice(rows, chunk_size)), [])
+
+
+def _json_chunks(lines, chunk_size, path):
+    """:return: an iterator of lists of the values on up to `chunk_size` lines of JSON at a time,
+    each list parsed by a single call to `json.loads`.
+    :raises InvalidBallotDataException: if a line isn't valid JSON, or isn't a JSON array
+    """
+    first_line = 1
+    for chunk in _chunks(lines, chunk_size):
+        numbers = range(first_line, first_line + len(chunk))
+        first_line += len(chunk)
+        numbered = [(n, line) for n, line in zip(numbers, chunk) if line and not line.isspace()]
+        chunk = [line for _, line in numbered]
+        try:
+            values = json.loads("[" + ",".join(chunk) + "]")
+        except json.JSONDecodeError:
+            # Find the line at fault, only now that something is known to be wrong
+            for n, line in numbered:
+                try:
+                    json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise InvalidBallotDataException(
+                        f"Invalid JSON on line {n} of {path}: {line!r} ({e})"
+                    )
+            raise InvalidBallotDataException(f"Invalid JSON in {path}")
+        if not all(isinstance(value, list) for value in values):
+            n, line = next(
+                numbered[i] for i, value in enumerate(values) if not isinstance(value, list)
+            )
+            raise InvalidBallotDataException(
+                f"Expected a JSON array on line {n} of {path}, got {line.strip()!r}"
+            )
+        yield values
+
+
+def _reporting(chunks, report):
+    """:return: the chunks, calling `report` with the throughput after each is consumed."""
+    start, rows = time.perf_counter(), 0
+    for chunk in chunks:
+        yield chunk
+        rows += len(chunk)
+        if report is not None:
+            report(rows, rows / max(time.perf_counter() - start, 1e-9))
+
+
+@contextmanager
+def _gc_paused():
+    """Pauses the cyclic garbage collector, if it was enabled, until the block exits."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
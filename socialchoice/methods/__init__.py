@@ -0,0 +1,4 @@
+"""
+Engines for the ranking methods in `Election`, which work on candidate indices and the arrays of a
+`PairwiseGraph` or a ballot box, rather than on candidate ids.
+"""
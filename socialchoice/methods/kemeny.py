@@ -0,0 +1,148 @@
+"""
+Kemeny–Young rankings, which maximize the total agreement with every pairwise vote.
+
+A ranking agrees with a vote between `i` and `j` if the vote's winner is ranked above its loser,
+and with half of a tie either way. So the agreement of a ranking is the sum of the support for `i`
+over `j`, `2 * wins[i, j] + ties[i, j]` counted in half-votes, over every `i` ranked above `j`.
+Both solvers only ever read this C×C support matrix, built from the tally. It is kept sparse for a
+sparse tally, and the local search then only reads single rows and columns of it.
+
+Finding the best ranking is NP-hard. Up to `EXACT_MAX_CANDIDATES` candidates, it is found exactly
+by dynamic programming over the subsets of candidates: the best ranking of a subset ends with some
+candidate `j`, after the best ranking of the rest of the subset, and placing `j` last agrees with
+the support of everything in the rest over `j`. The subsets are processed by size, all subsets of
+a size at once, so the DP takes O(2^C · C) vectorized work.
+
+Beyond that, a local search improves a ranking by moving single candidates to their best position,
+until no move helps, and then perturbs the best ranking found and searches again, until the time
+limit runs out. It keeps the best ranking found, so it can be stopped at any time.
+"""
+
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from socialchoice.graph import PairwiseGraph
+
+EXACT_MAX_CANDIDATES = 20
+"""The most candidates for which the best ranking is found exactly, using O(2^C) memory."""
+
+
+def support_matrix(graph: PairwiseGraph) -> np.ndarray:
+    """:return: a C×C matrix of the support for each candidate over each other candidate, counted
+    in half-votes, as a float array, which is exact for up to 2^53 votes. This is a
+    `scipy.sparse.csr_array` if the graph is sparse."""
+    support = 2 * graph.wins + graph.ties
+    if graph.sparse:
+        return sp.csr_array(support, dtype=np.float64)
+    return np.asarray(support, dtype=np.float64)
+
+
+def agreement(support: np.ndarray, order) -> float:
+    """:return: the total support of every candidate over every candidate after it in `order`."""
+    order = np.asarray(order, dtype=np.intp)
+    if sp.issparse(support):
+        support = support.tocoo()
+        position = np.empty(len(order), dtype=np.intp)
+        position[order] = np.arange(len(order))
+        return float(support.data[position[support.row] < position[support.col]].sum())
+    return float(np.triu(support[np.ix_(order, order)], 1).sum())
+
+
+def exact_ranking(support: np.ndarray) -> list:
+    """:return: the candidate indices in an order with the largest agreement, choosing between
+    equally good orders deterministically."""
+    if sp.issparse(support):
+        support = support.toarray()
+    n = len(support)
+    if n == 0:
+        return []
+    # The number of members of every subset, and the subsets grouped by size
+    sizes = np.zeros(1, dtype=np.int8)
+    for _ in range(n):
+        sizes = np.concatenate((sizes, sizes + 1))
+    by_size = np.split(np.argsort(sizes, kind="stable"), np.cumsum(np.bincount(sizes))[:-1])
+
+    best = np.full(1 << n, -np.inf)
+    best[0] = 0
+    last = np.zeros(1 << n, dtype=np.int8)
+    candidates = np.arange(n)
+
+    for subsets in by_size[:-1]:
+        members = (subsets[:, None] >> candidates & 1).astype(np.float64)
+        # gains[s, j] is the agreement gained by placing j after the members of subsets[s]
+        gains = members @ support
+        for j in range(n):
+            outside = (subsets >> j & 1) == 0
+            extended = subsets[outside] | 1 << j
+            score = best[subsets[outside]] + gains[outside, j]
+            improved = score > best[extended]
+            best[extended[improved]] = score[improved]
+            last[extended[improved]] = j
+
+    order, subset = [], (1 << n) - 1
+    while subset:
+        order.append(int(last[subset]))
+        subset ^= 1 << order[-1]
+    return order[::-1]
+
+
+def local_search_ranking(support: np.ndarray, time_limit: float, seed=0) -> list:
+    """:return: the candidate indices in the order with the largest agreement found by local search
+    within `time_limit` seconds. The search starts from the order of the total support of each
+    candidate, and always makes at least one pass, however short the time limit."""
+    deadline = time.perf_counter() + time_limit
+    rng = np.random.default_rng(seed)
+
+    # Rows of the transpose are the columns of the support, which are slow to take from a sparse row
+    # matrix
+    transposed = support.T.tocsr() if sp.issparse(support) else support.T
+    order = np.argsort(-support.sum(axis=1), kind="stable")
+    order = _improve(support, transposed, order, deadline)
+    best_order, best = order, agreement(support, order)
+
+    n = len(order)
+    while n > 2 and time.perf_counter() < deadline:
+        # Shuffle a random stretch of the best order, and search from there
+        length = rng.integers(2, min(n, 8) + 1)
+        start = rng.integers(0, n - length + 1)
+        order = best_order.copy()
+        order[start : start + length] = rng.permutation(order[start : start + length])
+
+        order = _improve(support, transposed, order, deadline)
+        score = agreement(support, order)
+        if score > best:
+            best_order, best = order, score
+
+    return best_order.tolist()
+
+
+def _improve(support, transposed, order: np.ndarray, deadline: float) -> np.ndarray:
+    """Moves each candidate in turn to the position in `order` with the most agreement, until no
+    move helps or the deadline passes. `transposed` is the transpose of `support`.
+
+    :return: the improved order
+    """
+    improved = True
+    while improved:
+        improved = False
+        for candidate in order.tolist():
+            position = int(np.flatnonzero(order == candidate)[0])
+            rest = np.delete(order, position)
+            # Inserting at q puts rest[:q] above the candidate, and rest[q:] below it
+            above = np.concatenate(([0], np.cumsum(_row(transposed, candidate)[rest])))
+            below = np.concatenate((np.cumsum(_row(support, candidate)[rest[::-1]])[::-1], [0]))
+            scores = above + below
+            target = int(np.argmax(scores))
+            if scores[target] > scores[position]:
+                order = np.insert(rest, target, candidate)
+                improved = True
+        if time.perf_counter() >= deadline:
+            break
+    return order
+
+
+def _row(matrix, i: int) -> np.ndarray:
+    """:return: row `i` of a dense or sparse matrix, as a dense array."""
+    return matrix[[i]].toarray()[0] if sp.issparse(matrix) else matrix[i]
@@ -0,0 +1,41 @@
+"""
+Scores for the pairwise ranking methods, computed as row and column reductions of the matrices of a
+`PairwiseGraph`.
+
+Every function returns an array with a score for each candidate index. They work on dense and
+sparse graphs alike, as sums along an axis and `nonzero` are supported by both.
+"""
+
+import numpy as np
+
+from socialchoice.graph import PairwiseGraph
+
+
+def copeland_scores(graph: PairwiseGraph) -> np.ndarray:
+    """:return: the number of candidates each candidate beat, minus the number it lost to, where a
+    candidate beat another if it won more of their matchups than it lost."""
+    winners, losers = graph.victory_edges()
+    n = len(graph)
+    return np.bincount(winners, minlength=n) - np.bincount(losers, minlength=n)
+
+
+def minimax_scores(graph: PairwiseGraph) -> np.ndarray:
+    """:return: the largest margin any opponent has against each candidate, that is, the ratio of
+    the opponent's wins to all votes in its matchup against the candidate. A candidate that hasn't
+    faced anyone scores 0."""
+    opponents, candidates = graph.matchup_edges()
+    scores = np.zeros(len(graph))
+    np.maximum.at(scores, candidates, graph.matchup_margins())
+    return scores
+
+
+def win_ratios(graph: PairwiseGraph, ties_as_wins=False) -> np.ndarray:
+    """:return: the ratio of each candidate's wins to its wins and losses, over all of its
+    matchups, counting its ties as wins if `ties_as_wins` is True, and ignoring them otherwise. A
+    candidate with no wins or losses scores 0."""
+    wins = graph.wins.sum(axis=1)
+    losses = graph.wins.sum(axis=0)
+    if ties_as_wins:
+        wins = wins + graph.ties.sum(axis=1)
+    total = wins + losses
+    return np.divide(wins, total, out=np.zeros(len(graph)), where=total > 0)
@@ -0,0 +1,104 @@
+"""
+Positional scoring rules, like Borda count and plurality, over the rank matrix of a
+`RankedChoiceBallotBox`.
+
+A positional rule gives `vector[p]` points for being in position `p` of a ballot, counting from 0,
+so the score of every candidate is a weighted sum over a ballots×candidates matrix of the points
+each candidate earns on each distinct ballot, weighted by the number of times the ballot was cast.
+That matrix is built straight from `ranks`, `SCORING_CHUNK_CELLS` cells at a time, without decoding
+any ballot into sets.
+
+Candidates tied on a ballot share the positions from the first position after the candidates above
+them to the last position before the candidates below them. How many points they earn from those
+positions is chosen by `ties`:
+
+- "average": the average of the points of the shared positions
+- "top": the points of the first of the shared positions
+- "bottom": the points of the last of the shared positions
+"""
+
+import numpy as np
+
+SCORING_CHUNK_CELLS = 2**24
+"""The number of cells of the ballots×candidates matrix of points built at a time."""
+
+TIE_RULES = ("average", "top", "bottom")
+
+
+def score_vector(rule: str, n: int) -> np.ndarray:
+    """:return: the points for each of `n` positions under a named rule, one of "borda" (n - 1 - p
+    points for position p), "plurality" (1 point for first), "anti_plurality" (1 point for all but
+    last), or "dowdall" (1 / (p + 1) points for position p)
+    :raises ValueError: if the rule is unknown"""
+    positions = np.arange(n)
+    if rule == "borda":
+        return n - 1 - positions
+    elif rule == "plurality":
+        return (positions == 0).astype(np.int64)
+    elif rule == "anti_plurality":
+        return (positions < n - 1).astype(np.int64)
+    elif rule == "dowdall":
+        return 1 / (positions + 1)
+    raise ValueError(f"Unknown positional scoring rule {rule!r}")
+
+
+def positional_scores(ranks: np.ndarray, counts: np.ndarray, vector, ties="average") -> np.ndarray:
+    """:return: the score of every candidate under the positional rule given by `vector`, the
+    points for each position. A shorter vector gives no points for the remaining positions.
+
+    :param ranks: the position of each candidate on each distinct ballot, as in
+                  `RankedChoiceBallotBox.ranks`
+    :param counts: the number of times each distinct ballot was cast
+    :param ties: how candidates tied on a ballot are scored, as described above
+    :raises ValueError: if `vector` is longer than the number of candidates, or `ties` is unknown
+    """
+    n_ballots, n = ranks.shape
+    vector = np.asarray(vector)
+    if vector.ndim != 1 or len(vector) > n:
+        raise ValueError(f"Expected at most {n} points, one for each position, got {vector}")
+    if ties not in TIE_RULES:
+        raise ValueError(f"Expected ties to be one of {TIE_RULES}, got {ties!r}")
+
+    points = np.zeros(n, dtype=np.result_type(vector, np.int64))
+    points[: len(vector)] = vector
+    # cumulative[p] is the sum of the points of the positions before p
+    cumulative = np.concatenate(([0], np.cumsum(points)))
+
+    dtype = np.float64 if ties == "average" else points.dtype
+    scores = np.zeros(n, dtype=np.result_type(dtype, counts))
+    rows_per_chunk = max(1, SCORING_CHUNK_CELLS // max(n, 1))
+    for start in range(0, n_ballots, rows_per_chunk):
+        chunk = ranks[start : start + rows_per_chunk]
+        above, tied = _places(chunk)
+        if ties == "average":
+            earned = (cumulative[above + tied] - cumulative[above]) / tied
+        elif ties == "top":
+            earned = points[above]
+        else:
+            earned = points[above + tied - 1]
+        scores += counts[start : start + rows_per_chunk] @ earned
+    return scores
+
+
+def _places(ranks: np.ndarray) -> tuple:
+    """:return: the number of candidates above each candidate on each ballot, and the number of
+    candidates sharing its position, including itself, as two arrays shaped like `ranks`."""
+    n = ranks.shape[1]
+    above = ranks.astype(np.int64)
+    tied = np.ones_like(above)
+    # Positions count tied candidates once, so on a ballot without ties, they are already the
+    # number of candidates above
+    with_ties = np.flatnonzero(ranks.max(axis=1, initial=0) < n - 1)
+    if len(with_ties) == 0:
+        return above, tied
+
+    # Shift each ballot's positions past the previous ballot's, so one search of the flattened
+    # sorted positions finds where each candidate's position starts and ends within its ballot
+    offsets = np.arange(len(with_ties), dtype=np.int64)[:, None]
+    shifted = above[with_ties] + offsets * (n + 1)
+    flat = np.sort(shifted, axis=1).ravel()
+    first = np.searchsorted(flat, shifted, side="left")
+    after = np.searchsorted(flat, shifted, side="right")
+    above[with_ties] = first - offsets * n
+    tied[with_ties] = after - first
+    return above, tied
@@ -0,0 +1,164 @@
+"""
+Ranked pairs, locking in edges against an incrementally maintained transitive closure.
+
+Ranked pairs considers the edges of the victory graph from the largest margin to the smallest, and
+locks in each edge unless it would create a cycle with the edges already locked in. Rather than
+searching the locked graph for a cycle for every edge, this keeps the transitive closure of the
+locked graph, so an edge `u -> v` would create a cycle exactly when `v` already reaches `u`, which
+is a single bit test.
+
+Most edges don't change the closure, as they are either already implied by the locked edges, or
+would create a cycle. When an edge does change it, only the rows of the nodes that gain a new
+descendant or ancestor are updated, so the total work of updating the closure is bounded by the
+number of pairs of candidates, however many edges there are.
+
+Most edges are decided by the closure long before they are reached, so rather than testing every
+edge one at a time in Python, the edges are tested a window at a time against a snapshot of the
+closure unpacked into a NumPy bit matrix. Only the edges the snapshot doesn't decide are tested
+again, and locked in, one at a time.
+
+For 5,000 candidates that have all faced each other, 12.5 million edges, this takes about 9
+seconds on one core when the margins are random, about 3 of which go to sorting the edges, where
+checking every edge one at a time took about 20. When the margins follow an underlying order of
+the candidates' strengths, about 2.6 million edges change the closure, and it takes about 17
+seconds, rather than about 30. The slow tests time the first case.
+"""
+
+import numpy as np
+
+from socialchoice.graph import PairwiseGraph
+
+WINDOW_EDGES_PER_CANDIDATE = 16
+"""The number of edges, per candidate, that `lock_edges` checks against each snapshot of the
+closure. Taking a snapshot copies the closure, so it is spread over many edges."""
+
+
+class TransitiveClosure:
+    """The reachability relation of a directed acyclic graph that edges are added to.
+
+    The descendants and the ancestors of every node are kept as bitsets, stored as Python integers
+    where bit `j` of `descendants[i]` is set if there is a path of at least one edge from `i` to `j`.
+    """
+
+    def __init__(self, n: int):
+        self.descendants = [0] * n
+        self.ancestors = [0] * n
+
+    def add_node(self) -> int:
+        """Adds a node without any edges.
+
+        :return: the index of the new node
+        """
+        self.descendants.append(0)
+        self.ancestors.append(0)
+        return len(self.descendants) - 1
+
+    def reaches(self, u: int, v: int) -> bool:
+        return self.descendants[u] >> v & 1 == 1
+
+    def would_create_cycle(self, u: int, v: int) -> bool:
+        return u == v or self.reaches(v, u)
+
+    def add_edge(self, u: int, v: int):
+        """Adds the edge `u -> v`, which must not create a cycle. Everything that reaches `u`, and
+        `u` itself, now reaches `v` and everything `v` reaches."""
+        descendants, ancestors = self.descendants, self.ancestors
+        new_descendants = descendants[v] | 1 << v
+        new_ancestors = ancestors[u] | 1 << u
+
+        # Ancestors of `v` already reach everything `v` reaches, and descendants of `u` are already
+        # reached by everything that reaches `u`, so every other row gains at least one bit
+        sources = new_ancestors & ~ancestors[v]
+        targets = new_descendants & ~descendants[u]
+        # Most often, only `u` gains descendants and only `v` gains ancestors
+        if sources & (sources - 1):
+            for i in _members(sources):
+                descendants[i] |= new_descendants
+        else:
+            descendants[u] |= new_descendants
+        if targets & (targets - 1):
+            for i in _members(targets):
+                ancestors[i] |= new_ancestors
+        else:
+            ancestors[v] |= new_ancestors
+
+    def packed_descendants(self) -> np.ndarray:
+        """:return: the descendants of every node as a matrix of bits, where bit `j % 8` of byte
+        `[i, j // 8]` is set if `i` reaches `j`."""
+        size = (len(self.descendants) + 7) // 8
+        rows = b"".join(row.to_bytes(size, "little") for row in self.descendants)
+        return np.frombuffer(rows, dtype=np.uint8).reshape(len(self.descendants), size)
+
+    def descendant_counts(self) -> np.ndarray:
+        """:return: the number of nodes each node reaches."""
+        return np.array([bin(row).count("1") for row in self.descendants], dtype=np.int64)
+
+
+def _members(bits: int) -> list:
+    """:return: the positions of the set bits of `bits`."""
+    members = []
+    # Most bitsets are small, and are quickest to walk a bit at a time, from the highest bit down so
+    # that the integer shrinks as it goes, but the bits left after that are unpacked in one go
+    for _ in range(64):
+        if not bits:
+            return members
+        highest = bits.bit_length() - 1
+        members.append(highest)
+        bits ^= 1 << highest
+    packed = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    members.extend(np.flatnonzero(np.unpackbits(packed, bitorder="little")).tolist())
+    return members
+
+
+def sorted_victory_edges(graph: PairwiseGraph) -> tuple:
+    """:return: the winners, losers, and margins of the edges of the victory graph, from the largest
+    margin to the smallest. Edges with equal margins are ordered by the index of the winner, and
+    then by the index of the loser, so the order is deterministic."""
+    winners, losers = graph.victory_edges()
+    margins = graph.victory_margins()
+    # The edges come in row-major order, so a stable sort keeps equal margins ordered by index
+    order = np.argsort(-margins, kind="stable")
+    return winners[order], losers[order], margins[order]
+
+
+def lock_edges(graph: PairwiseGraph) -> tuple:
+    """Runs ranked pairs over a pairwise graph.
+
+    :return: the closure of the locked graph, and the winners, losers, and margins of the locked
+             edges, in the order they were locked
+    """
+    winners, losers, margins = sorted_victory_edges(graph)
+    closure = TransitiveClosure(len(graph))
+    descendants = closure.descendants
+    locked = np.zeros(len(winners), dtype=bool)
+
+    window = WINDOW_EDGES_PER_CANDIDATE * max(len(graph), 1)
+    for start in range(0, len(winners), window):
+        stop = min(start + window, len(winners))
+        first, second = winners[start:stop], losers[start:stop]
+        # The closure only grows, so an edge it already decides can be decided against this
+        # snapshot of it: rejected if it would create a cycle, and locked in if it is implied
+        reached = closure.packed_descendants()
+        rejected = (reached[second, first >> 3] >> (first & 7) & 1).astype(bool)
+        implied = (reached[first, second >> 3] >> (second & 7) & 1).astype(bool)
+        locked[start:stop] = implied
+
+        undecided = np.flatnonzero(~rejected & ~implied)
+        for i, u, v in zip(
+            (undecided + start).tolist(), first[undecided].tolist(), second[undecided].tolist()
+        ):
+            if descendants[v] >> u & 1:
+                continue
+            locked[i] = True
+            # Edges implied by the locked edges are locked in without changing the closure
+            if not descendants[u] >> v & 1:
+                closure.add_edge(u, v)
+
+    return closure, winners[locked], losers[locked], margins[locked]
+
+
+def ranked_pairs_scores(graph: PairwiseGraph) -> np.ndarray:
+    """:return: the number of candidates each candidate reaches in the locked graph. A candidate
+    reaches everything the candidates it reaches do, and more, so sorting by these scores gives a
+    topological order of the locked graph, the ranked pairs ranking."""
+    return lock_edges(graph)[0].descendant_counts()
@@ -0,0 +1,198 @@
+"""
+Instant-runoff voting and the single transferable vote, over the rank matrix of a
+`RankedChoiceBallotBox`.
+
+Rather than recounting every ballot in every round, each distinct ballot points at its current
+preference, the highest position on it with a continuing candidate, and every candidate keeps a
+pile of the ballots whose current preference it is in. When a candidate is removed, only the
+ballots in its pile are looked at again, and only those whose preference has no other continuing
+candidate move their pointer on. Each pointer only ever moves forwards, so counting every round
+takes O(ballots + transfers) work, which is done for all the ballots in a pile at once.
+
+A ballot whose current preference is a tie between several continuing candidates counts equally
+towards each of them. Splitting ballots makes counts that should be equal differ by rounding, so
+counts are rounded to `DECIMALS` decimal places before they are compared.
+"""
+
+import numpy as np
+
+DECIMALS = 9
+
+
+class TransferableBallots:
+    """The current count of each candidate, as candidates are eliminated or elected.
+
+    :param ranks: the position of each candidate on each distinct ballot, as in
+                  `RankedChoiceBallotBox.ranks`
+    :param counts: the number of times each distinct ballot was cast
+    """
+
+    def __init__(self, ranks: np.ndarray, counts: np.ndarray):
+        n_ballots, n = ranks.shape
+        self.continuing = np.ones(n, dtype=bool)
+        self.tallies = np.zeros(n)
+        """The value of the ballots counting towards each candidate."""
+        self.weights = np.asarray(counts, dtype=np.float64).copy()
+        """The value of each distinct ballot, which shrinks when a candidate it counts towards is
+        elected with a surplus."""
+
+        # The candidates on each ballot from first to last, and where each position ends, unless
+        # no ballot has a tie, when each position ends right after it starts
+        self._order = np.argsort(ranks, axis=1, kind="stable")
+        sorted_ranks = np.take_along_axis(ranks, self._order, axis=1)
+        self._ends = None
+        if not (sorted_ranks[:, 1:] != sorted_ranks[:, :-1]).all():
+            self._ends = np.full((n_ballots, n), n, dtype=np.intp)
+            for j in range(n - 2, -1, -1):
+                self._ends[:, j] = np.where(
+                    sorted_ranks[:, j + 1] != sorted_ranks[:, j], j + 1, self._ends[:, j + 1]
+                )
+        self._starts = np.zeros(n_ballots, dtype=np.intp)
+        self._piles = [[] for _ in range(n)]
+
+        if n:
+            self._move_on(np.arange(n_ballots))
+
+    def remove(self, candidate: int, kept=1.0):
+        """Removes `candidate` from the count, and transfers the ballots counting towards it to
+        their next preference.
+
+        :param candidate: the index of the candidate
+        :param kept: the fraction of the value each ballot counted towards `candidate` that
+                     transfers, which is less than 1 when the candidate is elected with a surplus
+        """
+        self.continuing[candidate] = False
+        self.tallies[candidate] = 0
+        pile = self._piles[candidate]
+        self._piles[candidate] = []
+        if not pile:
+            return
+        ballots = np.concatenate(pile)
+
+        ballot, members = self._preferences(ballots)
+        continuing = self.continuing[members]
+        remaining = np.bincount(ballot, weights=continuing, minlength=len(ballots))
+        old_weights = self.weights[ballots]
+        old_share = old_weights / (remaining + 1)
+        self.weights[ballots] = old_weights - old_share * (1 - kept)
+
+        # Ballots that still have a continuing candidate in their current preference now count
+        # more towards each of them, and the rest move on to their next preference
+        shared = remaining > 0
+        change = self.weights[ballots] / np.maximum(remaining, 1) - old_share
+        counted = continuing & shared[ballot]
+        self.tallies += np.bincount(
+            members[counted], weights=change[ballot[counted]], minlength=len(self.tallies)
+        )
+        self._move_on(ballots[~shared])
+
+    def _preferences(self, ballots: np.ndarray) -> tuple:
+        """:return: the candidates in the current preference of each of `ballots`, as an array of
+        which of `ballots` each candidate is on, and an array of the candidates."""
+        starts = self._starts[ballots]
+        if self._ends is None:
+            return np.arange(len(ballots)), self._order[ballots, starts]
+        lengths = self._ends[ballots, starts] - starts
+        ballot = np.repeat(np.arange(len(ballots)), lengths)
+        offsets = np.arange(len(ballot)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return ballot, self._order[ballots[ballot], starts[ballot] + offsets]
+
+    def _move_on(self, ballots: np.ndarray):
+        """Moves each of `ballots` on to the next position with a continuing candidate, from its
+        current position, and counts it towards the candidates there."""
+        n = len(self.continuing)
+        while len(ballots):
+            ballot, members = self._preferences(ballots)
+            continuing = self.continuing[members]
+            present = np.bincount(ballot, weights=continuing, minlength=len(ballots))
+
+            found = present > 0
+            counted = continuing & found[ballot]
+            shares = self.weights[ballots] / np.maximum(present, 1)
+            self.tallies += np.bincount(
+                members[counted], weights=shares[ballot[counted]], minlength=n
+            )
+            for candidate, pile in _group_by(members[counted], ballots[ballot[counted]]):
+                self._piles[candidate].append(pile)
+
+            # Ballots without a continuing candidate here look at their next position, unless
+            # they have run out of positions and are exhausted
+            ballots = ballots[~found]
+            if self._ends is None:
+                self._starts[ballots] += 1
+            else:
+                self._starts[ballots] = self._ends[ballots, self._starts[ballots]]
+            ballots = ballots[self._starts[ballots] < n]
+
+
+def _group_by(keys: np.ndarray, values: np.ndarray):
+    """:return: an iterator of each distinct key, and an array of the values with that key."""
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    if len(keys) == 0:
+        return iter(())
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    return zip(keys[np.r_[0, boundaries]].tolist(), np.split(values, boundaries))
+
+
+def instant_runoff(ranks: np.ndarray, counts: np.ndarray) -> list:
+    """Eliminates the candidate with the fewest votes until one is left. Ties for the fewest votes
+    are broken by eliminating the candidate with the largest index.
+
+    :return: (candidate index, votes) tuples, from the winner to the first candidate eliminated,
+             where votes are the candidate's count in the last round it was in
+    """
+    n = ranks.shape[1]
+    ballots = TransferableBallots(ranks, counts)
+    eliminated = []
+    for _ in range(n):
+        candidate = _fewest(ballots)
+        eliminated.append((candidate, ballots.tallies[candidate].item()))
+        ballots.remove(candidate)
+    return eliminated[::-1]
+
+
+def single_transferable_vote(ranks: np.ndarray, counts: np.ndarray, seats: int) -> list:
+    """Elects `seats` candidates by the single transferable vote, with the Droop quota and
+    fractional transfers of surpluses.
+
+    While a seat is open, the continuing candidate with the most votes is elected if it reaches the
+    quota, and the ballots counting towards it transfer the fraction of their value above the
+    quota. Otherwise, the candidate with the fewest votes is eliminated. Once there are only as
+    many continuing candidates as open seats, they are all elected.
+
+    :return: (candidate index, votes) tuples of the elected candidates, in the order they were
+             elected, where votes are the candidate's count when it was elected
+    """
+    n = ranks.shape[1]
+    seats = min(seats, n)
+    quota = int(np.sum(counts)) // (seats + 1) + 1
+    ballots = TransferableBallots(ranks, counts)
+
+    elected = []
+    while len(elected) < seats:
+        if np.count_nonzero(ballots.continuing) <= seats - len(elected):
+            remaining = np.flatnonzero(ballots.continuing)
+            order = np.argsort(-_comparable(ballots)[remaining], kind="stable")
+            elected.extend((i, ballots.tallies[i].item()) for i in remaining[order].tolist())
+            break
+
+        tallies = np.where(ballots.continuing, _comparable(ballots), -np.inf)
+        candidate = int(np.argmax(tallies))
+        votes = ballots.tallies[candidate].item()
+        if tallies[candidate] >= quota:
+            elected.append((candidate, votes))
+            ballots.remove(candidate, kept=max(votes - quota, 0) / votes)
+        else:
+            ballots.remove(_fewest(ballots))
+    return elected
+
+
+def _fewest(ballots: TransferableBallots) -> int:
+    """:return: the continuing candidate with the fewest votes, and the largest index of those."""
+    tallies = np.where(ballots.continuing, _comparable(ballots), np.inf)
+    return int(np.flatnonzero(tallies == tallies.min())[-1])
+
+
+def _comparable(ballots: TransferableBallots) -> np.ndarray:
+    return np.round(ballots.tallies, DECIMALS)
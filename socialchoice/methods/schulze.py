@@ -0,0 +1,133 @@
+"""
+The Schulze method, computing the strongest paths between every pair of candidates with a blocked
+Floyd–Warshall over the margins of the victory graph.
+
+The strength of a path is the smallest margin along it, and the strongest path from `i` to `j` is
+the path with the largest strength, so Floyd–Warshall runs over the (max, min) semiring. Only the
+order of the margins matters to that, so the margins are replaced by their ranks among the distinct
+margins, which fit in 16-bit integers for all but the largest elections, halving the memory of the
+C×C matrix compared to 32-bit floats, and letting NumPy compare twice as many at once.
+
+Plain Floyd–Warshall sweeps the whole matrix once per candidate, which is bound by memory bandwidth
+once the matrix doesn't fit in cache. Instead, the candidates are split into blocks of
+`BLOCK_SIZE`. For each block, the rows and columns of the block are brought up to date first, and
+then the rest of the matrix is updated with paths through the block `ROW_CHUNK` rows at a time,
+each chunk staying in cache while every candidate in the block is considered.
+
+A sparse graph is split into its strongly connected components first. A path between two candidates
+in the same component never leaves it, so strongest paths are only computed within each component,
+and a candidate beats every candidate of another component that it reaches, which can't reach it
+back. That needs only a matrix per component, rather than a C×C matrix.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from socialchoice.graph import PairwiseGraph
+
+BLOCK_SIZE = 64
+"""The number of intermediate candidates considered for each pass over the matrix."""
+ROW_CHUNK = 64
+"""The number of rows of the matrix updated at a time within a pass."""
+
+
+def link_strengths(graph: PairwiseGraph) -> tuple:
+    """:return: a C×C matrix of the strength of the direct link from each candidate to each other
+    candidate, and the margin of each strength. A link is as strong as the rank of its margin among
+    all the distinct margins, starting from 1, or 0 if there is no link, when `i` didn't beat `j`.
+    The matrix is a `scipy.sparse.csr_array` if the graph is sparse.
+    """
+    winners, losers = graph.victory_edges()
+    levels, ranks = np.unique(graph.victory_margins(), return_inverse=True)
+    levels = np.concatenate(([0.0], levels))
+
+    n = len(graph)
+    dtype = np.uint16 if len(levels) <= np.iinfo(np.uint16).max else np.uint32
+    if graph.sparse:
+        strengths = sp.csr_array(((ranks + 1).astype(dtype), (winners, losers)), shape=(n, n))
+        return strengths, levels
+    strengths = np.zeros((n, n), dtype=dtype)
+    strengths[winners, losers] = ranks + 1
+    return strengths, levels
+
+
+def strongest_paths(strengths: np.ndarray) -> np.ndarray:
+    """:return: the strength of the strongest path from each candidate to each other candidate,
+    given the strength of every direct link. The diagonal is meaningless."""
+    paths = strengths.copy()
+    n = len(paths)
+    scratch = np.empty((min(ROW_CHUNK, n), n), dtype=paths.dtype)
+
+    for start in range(0, n, BLOCK_SIZE):
+        block = slice(start, min(start + BLOCK_SIZE, n))
+
+        # Bring the rows and columns of the block up to date, one intermediate at a time, as
+        # Floyd–Warshall would. These only depend on each other.
+        rows, columns = paths[block], paths[:, block]
+        for k in range(block.start, block.stop):
+            np.maximum(rows, np.minimum(paths[block, k, None], paths[k]), out=rows)
+            np.maximum(columns, np.minimum(paths[:, k, None], paths[k, block]), out=columns)
+
+        # Then every other path can go through any of the block's candidates, using the final rows
+        # and columns of the block
+        rows, columns = rows.copy(), columns.copy()
+        for chunk_start in range(0, n, ROW_CHUNK):
+            chunk = paths[chunk_start : chunk_start + ROW_CHUNK]
+            chunk_columns = columns[chunk_start : chunk_start + ROW_CHUNK]
+            through = scratch[: len(chunk)]
+            for k in range(len(rows)):
+                # Broadcasting the row into place first is much faster than broadcasting it
+                # within np.minimum, which falls back to a slow loop for long rows
+                np.copyto(through, rows[k])
+                np.minimum(through, chunk_columns[:, k, None], out=through)
+                np.maximum(chunk, through, out=chunk)
+
+    return paths
+
+
+def schulze_scores(graph: PairwiseGraph) -> np.ndarray:
+    """:return: the number of candidates each candidate beats by Schulze, where `i` beats `j` if the
+    strongest path from `i` to `j` is stronger than the strongest path from `j` to `i`. That
+    relation is transitive, so sorting by these scores gives the Schulze ranking."""
+    strengths = link_strengths(graph)[0]
+    if sp.issparse(strengths):
+        return _scores_by_component(strengths)
+    paths = strongest_paths(strengths)
+    return np.count_nonzero(paths > paths.T, axis=1)
+
+
+def _scores_by_component(strengths: sp.csr_array) -> np.ndarray:
+    """:return: the Schulze scores of a sparse matrix of link strengths, computing strongest paths
+    within each strongly connected component."""
+    n = strengths.shape[0]
+    count, labels = connected_components(strengths, directed=True, connection="strong")
+    members = np.split(np.argsort(labels, kind="stable"), np.cumsum(np.bincount(labels))[:-1])
+
+    scores = np.zeros(n, dtype=np.int64)
+    for component in members:
+        if len(component) > 1:
+            paths = strongest_paths(strengths[component][:, component].toarray())
+            scores[component] = np.count_nonzero(paths > paths.T, axis=1)
+
+    # The links between components form a DAG, so the candidates each component reaches, as a
+    # bitset, can be found in a reverse topological order, which Kahn's algorithm gives
+    links = strengths.tocoo()
+    sources, targets = labels[links.row], labels[links.col]
+    between = sources != targets
+    sources, targets = np.unique(np.stack((sources[between], targets[between])), axis=1)
+    successors = np.split(targets, np.cumsum(np.bincount(sources, minlength=count))[:-1])
+    unresolved = np.bincount(targets, minlength=count)
+    order = np.flatnonzero(unresolved == 0).tolist()
+    for component in order:
+        for successor in successors[component].tolist():
+            unresolved[successor] -= 1
+            if unresolved[successor] == 0:
+                order.append(successor)
+
+    bits = [sum(1 << int(i) for i in component) for component in members]
+    reached = [0] * count
+    for component in reversed(order):
+        for successor in successors[component].tolist():
+            reached[component] |= bits[successor] | reached[successor]
+    return scores + np.array([bin(bitset).count("1") for bitset in reached], dtype=np.int64)[labels]
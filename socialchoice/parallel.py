@@ -0,0 +1,153 @@
+"""
+Map-reduce tallying of pairwise votes across a pool of processes.
+
+Pairwise tallies are purely additive, so the votes can be split into shards that are validated and
+tallied independently, and the partial tallies summed. Each worker builds a `PairwiseBallotBox` for
+its shard, and sends back the shard's tally and encoded votes, which are small arrays rather than
+Python objects. The partial tallies are merged in shard order, so the candidates are indexed in
+the same order as if the votes had been counted by a single ballot box.
+
+`parallel_tally_csv` is the one to use for tallying a large file of votes across many cores. It
+splits the file into byte ranges, and each worker reads and parses its own range, so only the
+partial tallies cross between processes. `parallel_tally` takes votes that are already Python
+objects, so this process still has to read them and pickle them to the workers, and that part
+doesn't scale with the number of workers.
+
+Only the part that runs in this process has been measured, on a single core. A worker takes about
+12 seconds to tally the 3 million votes of a 36 MB CSV file, and this process takes about 0.2
+seconds to unpickle and merge its tally and votes, which bounds the speedup of `parallel_tally_csv`
+with 32 workers to about 22 times. `parallel_tally` spends about 0.5 seconds pickling each million
+votes, against 2.7 seconds for a worker to tally them, which bounds its speedup with 32 workers to
+about 5 times. Neither has been measured on a host with many cores.
+"""
+
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from more_itertools import chunked
+
+from socialchoice.ballot import DEFAULT_CHUNK_SIZE, PairwiseBallotBox
+from socialchoice.loaders import _chunks, _load_pairwise, load_pairwise_csv
+
+DEFAULT_SHARD_BYTES = 1 << 26
+"""The number of bytes of a CSV file that each worker reads and tallies at a time."""
+
+
+def parallel_tally(
+    votes, workers=None, candidates=None, keep_votes=True, shard_size=DEFAULT_CHUNK_SIZE
+) -> PairwiseBallotBox:
+    """Creates a PairwiseBallotBox from `votes`, validating and tallying shards of the votes in
+    parallel across a pool of processes.
+
+    The votes are read, and pickled to the workers, by this process, so that is the part that
+    doesn't scale with the number of workers, and it bounds the speedup well short of linear. Use
+    `parallel_tally_csv` to have the workers read the votes themselves. At most two shards per
+    worker are in flight at a time, so `votes` can be a generator over more votes than fit in
+    memory.
+
+    :param votes: an iterable of votes, as described in `PairwiseBallotBox`
+    :param workers: the number of worker processes, or None for one per CPU. With one worker, the
+    votes are tallied in this process.
+    :param candidates: None, or the candidates being voted on, as in `PairwiseBallotBox`
+    :param keep_votes: whether to keep the votes, as in `PairwiseBallotBox`
+    :param shard_size: the number of votes each worker tallies at a time
+    :return: a PairwiseBallotBox of all the votes
+    :raises InvalidBallotDataException: if any vote is invalid
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return PairwiseBallotBox(votes, candidates, keep_votes=keep_votes, chunk_size=shard_size)
+
+    ballot_box = PairwiseBallotBox([], candidates, keep_votes=keep_votes)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for shard in chunked(votes, shard_size):
+            if len(in_flight) == 2 * workers:
+                _merge(ballot_box, *in_flight.popleft().result())
+            in_flight.append(pool.submit(_tally_shard, shard, candidates, keep_votes))
+        while in_flight:
+            _merge(ballot_box, *in_flight.popleft().result())
+    return ballot_box
+
+
+def parallel_tally_csv(
+    path,
+    workers=None,
+    candidates=None,
+    header=False,
+    keep_votes=True,
+    shard_bytes=DEFAULT_SHARD_BYTES,
+) -> PairwiseBallotBox:
+    """Creates a PairwiseBallotBox from a CSV file of pairwise votes, as `load_pairwise_csv` does,
+    having each worker in a pool of processes read, parse, and tally its own byte range of the file.
+
+    The file is split into ranges of `shard_bytes`, and each line is tallied by the worker whose
+    range it starts in, so no vote may contain a line break, even in quotes. This process only
+    merges the partial tallies, in file order.
+
+    :param path: the path of the CSV file, where each row is a vote of the form
+    `first,second,result`
+    :param workers: the number of worker processes, or None for one per CPU. With one worker, the
+    file is loaded in this process.
+    :param candidates: None, or the candidates being voted on, as in `PairwiseBallotBox`
+    :param header: whether the first row is a header, rather than a vote
+    :param keep_votes: whether to keep the votes, as in `PairwiseBallotBox`
+    :param shard_bytes: the number of bytes of the file each worker tallies at a time
+    :return: a PairwiseBallotBox of all the votes
+    :raises InvalidBallotDataException: if any row is not a valid vote
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return load_pairwise_csv(path, candidates, header=header, keep_votes=keep_votes)
+
+    size = os.path.getsize(path)
+    ballot_box = PairwiseBallotBox([], candidates, keep_votes=keep_votes)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for start in range(0, size, shard_bytes):
+            if len(in_flight) == 2 * workers:
+                _merge(ballot_box, *in_flight.popleft().result())
+            end = min(start + shard_bytes, size)
+            in_flight.append(
+                pool.submit(_tally_csv_range, path, start, end, header, candidates, keep_votes)
+            )
+        while in_flight:
+            _merge(ballot_box, *in_flight.popleft().result())
+    return ballot_box
+
+
+def _tally_csv_range(path, start, end, header, candidates, keep_votes) -> tuple:
+    """:return: the tally of the votes on the lines of a CSV file that start at a byte in
+    `[start, end)`, and the encoded votes if they are being kept."""
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip the rest of the line the byte before the range is on, which belongs to the
+            # previous range, unless that byte ends it
+            f.seek(start - 1)
+            f.readline()
+        elif header:
+            f.readline()
+        data = f.read(max(end - f.tell(), 0))
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+
+    rows = filter(None, csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+    shard = _load_pairwise(_chunks(rows, DEFAULT_CHUNK_SIZE), candidates, False, keep_votes, None)
+    return shard.tally, shard.vote_store.columns() if keep_votes else None
+
+
+def _tally_shard(votes, candidates, keep_votes) -> tuple:
+    """:return: the tally of a shard of votes, and the encoded votes if they are being kept."""
+    shard = PairwiseBallotBox(votes, candidates, keep_votes=keep_votes, chunk_size=len(votes))
+    return shard.tally, shard.vote_store.columns() if keep_votes else None
+
+
+def _merge(ballot_box: PairwiseBallotBox, tally, columns):
+    """Adds a shard's tally, and its encoded votes if they are being kept, to `ballot_box`."""
+    mapping = ballot_box._count_tally(tally)
+    if columns is not None:
+        first, second, results = columns
+        ballot_box.vote_store.append(mapping[first], mapping[second], results)
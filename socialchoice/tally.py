@@ -0,0 +1,406 @@
+"""
+Array-backed tallies of pairwise votes.
+
+Candidates are interned to integer indices once, and the results of every matchup are kept as
+C×C integer matrices, where C is the number of candidates. `wins[i, j]` is the number of times the
+candidate with index `i` beat the candidate with index `j`, and `ties[i, j]` is the number of
+times they tied. Losses are not stored separately, as `i` lost to `j` exactly as many times as `j`
+beat `i`.
+
+When there are many candidates, but each has only faced a few others, most of those C² cells are
+zero. Such tallies are stored as sparse `scipy.sparse.csr_array` matrices instead, with an entry
+for each pair of candidates that has faced each other, which is chosen automatically as described
+in `SPARSE_MIN_CANDIDATES`.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import scipy.sparse as sp
+
+WIN, LOSS, TIE = 0, 1, 2
+RESULT_CODES = {"win": WIN, "loss": LOSS, "tie": TIE}
+
+RANKING_CHUNK_CELLS = 2**24
+"""The number of pairwise comparisons `add_rankings` makes at a time, bounding its memory use."""
+
+SPARSE_MIN_CANDIDATES = 2048
+"""When a tally grows to at least this many candidates, it switches to sparse matrices if fewer than
+`SPARSE_MAX_DENSITY` of the ordered pairs of candidates have faced each other."""
+SPARSE_MAX_DENSITY = 0.01
+
+
+class PairwiseTally:
+    """Counts of the wins, losses, and ties between every pair of candidates.
+
+    Votes can be added and removed at any time, at a cost proportional to the number of votes
+    added or removed. Dense matrices are over-allocated, doubling in size when they run out of
+    room, so that adding new candidates takes amortized constant time. Votes counted by sparse
+    matrices are buffered, and merged into the matrices the next time the matrices are read.
+    """
+
+    def __init__(self, candidates=(), sparse=None):
+        """
+        :param candidates: candidates to intern before any votes are counted. Their indices will
+                           be assigned in iteration order, starting at 0.
+        :param sparse: whether to store the counts in sparse matrices, or None to choose
+                       automatically, as described in `SPARSE_MIN_CANDIDATES`
+        """
+        self.ids = []
+        self.index = {}
+        self.sparse = bool(sparse)
+        self._choose_storage = sparse is None
+        if self.sparse:
+            self._wins = sp.csr_array((0, 0), dtype=np.int64)
+            self._ties = sp.csr_array((0, 0), dtype=np.int64)
+        else:
+            self._wins = np.zeros((0, 0), dtype=np.int64)
+            self._ties = np.zeros((0, 0), dtype=np.int64)
+        # Updates to sparse matrices that haven't been merged into them yet
+        self._pending = []
+
+        for candidate in candidates:
+            self.intern(candidate)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def wins(self) -> np.ndarray:
+        """:return: a C×C matrix, where entry `[i, j]` is the number of times `i` beat `j`. This is
+        a `scipy.sparse.csr_array` if this tally is sparse."""
+        self._fit()
+        if self.sparse:
+            self._flush()
+            return self._wins
+        return self._wins[: len(self.ids), : len(self.ids)]
+
+    @property
+    def losses(self) -> np.ndarray:
+        """:return: a C×C matrix, where entry `[i, j]` is the number of times `i` lost to `j`."""
+        return self.wins.T
+
+    @property
+    def ties(self) -> np.ndarray:
+        """:return: a C×C matrix, where entry `[i, j]` is the number of times `i` tied `j`. This is
+        a `scipy.sparse.csr_array` if this tally is sparse."""
+        self._fit()
+        if self.sparse:
+            self._flush()
+            return self._ties
+        return self._ties[: len(self.ids), : len(self.ids)]
+
+    def results(self, first, second) -> tuple:
+        """:return: the number of wins, losses, and ties of each candidate index in `first` against
+        the candidate index at the same position in `second`, as three arrays."""
+        return results_between(self.wins, self.ties, first, second)
+
+    def intern(self, candidate) -> int:
+        """
+        :return: the index of the given candidate, assigning it the next free index if this
+                 candidate has not been seen before.
+        """
+        try:
+            return self.index[candidate]
+        except KeyError:
+            index = self.index[candidate] = len(self.ids)
+            self.ids.append(candidate)
+            return index
+
+    def encode(self, votes, intern=True) -> tuple:
+        """Encodes pairwise votes as three equal-length arrays: the indices of the first candidates,
+        the indices of the second candidates, and the result codes.
+
+        :param votes: a collection of valid votes, as described in `PairwiseBallotBox`
+        :param intern: whether to intern candidates that have not been seen before
+        :raises KeyError: if `intern` is False and a vote mentions an unknown candidate
+        """
+        if not isinstance(votes, list):
+            votes = list(votes)
+        if not votes:
+            return np.zeros(0, np.intp), np.zeros(0, np.intp), np.zeros(0, np.int8)
+
+        # Only the first three fields are needed, so votes may carry extra fields, such as voters
+        return self.encode_columns(*list(zip(*votes))[:3], intern=intern)
+
+    def encode_columns(self, first, second, results, intern=True) -> tuple:
+        """Like `encode`, but for votes given as three equal-length sequences: the first candidates,
+        the second candidates, and the results. This avoids building a tuple for each vote.
+
+        The results are encoded first, so an invalid result raises before any candidate is
+        interned.
+
+        :raises KeyError: if any result is not "win", "loss", or "tie", or if `intern` is False and
+                          a vote mentions an unknown candidate
+        """
+        n = len(results)
+        results = np.fromiter(map(RESULT_CODES.__getitem__, results), dtype=np.int8, count=n)
+        if intern:
+            # Intern each distinct candidate once, in order of first appearance, so that every vote
+            # can then be looked up directly in the index
+            for candidate in (*dict.fromkeys(first), *dict.fromkeys(second)):
+                self.intern(candidate)
+        return (
+            np.fromiter(map(self.index.__getitem__, first), dtype=np.intp, count=n),
+            np.fromiter(map(self.index.__getitem__, second), dtype=np.intp, count=n),
+            results,
+        )
+
+    def canonical(self, vote) -> tuple:
+        """:return: a hashable key for `vote` that is the same for every vote with the same effect
+        on the tally. For example, `("a", "b", "win")` and `("b", "a", "loss")` share a key."""
+        i, j, result = self.index[vote[0]], self.index[vote[1]], RESULT_CODES[vote[2]]
+        if result == LOSS or (result == TIE and j < i):
+            return j, i, WIN if result == LOSS else TIE
+        return i, j, result
+
+    def add_votes(self, votes):
+        """Counts every vote in `votes`, each of which must be a valid pairwise vote.
+
+        :param votes: a collection of votes, as described in `PairwiseBallotBox`
+        """
+        self.add_encoded(*self.encode(votes))
+
+    def remove_votes(self, votes):
+        """Stops counting every vote in `votes`, each of which must have been counted before.
+
+        :param votes: a collection of votes, as described in `PairwiseBallotBox`
+        :raises ValueError: if any of the votes was not counted, in which case nothing is removed
+        """
+        try:
+            encoded = self.encode(votes, intern=False)
+        except KeyError as e:
+            raise ValueError(f"Cannot remove votes for unknown candidate {e}")
+        self.remove_encoded(*encoded)
+
+    def add_rankings(self, ranks, counts=None):
+        """Counts ranked ballots given as a rank-position matrix, without converting them to
+        pairwise votes. A candidate beats every candidate with a higher position on the same ballot,
+        and ties every other candidate with the same position.
+
+        :param ranks: a matrix with a row per ballot and a column per candidate index, where
+                      `ranks[b, i]` is the position of candidate `i` on ballot `b`
+        :param counts: the number of times each ballot was cast, or None if each was cast once
+        """
+        n = len(self.ids)
+        # Every ballot compares every pair of candidates
+        self._fit(new_votes=n * (n - 1) // 2 if len(ranks) else 0)
+        ranks = np.asarray(ranks)
+
+        # Compare the positions of a block of candidates against every other candidate on a chunk of
+        # ballots at once, sizing the blocks and the chunks so that neither the block's counts nor
+        # the ballots×block×C comparison arrays grow with C×C.
+        block_size = max(1, min(n, RANKING_CHUNK_CELLS // 16 // max(n, 1)))
+        rows_per_chunk = max(1, RANKING_CHUNK_CELLS // max(block_size * n, 1))
+        for block_start in range(0, n, block_size):
+            block_stop = min(block_start + block_size, n)
+            block = slice(block_start, block_stop)
+            wins = np.zeros((block_stop - block_start, n), dtype=np.int64)
+            ties = np.zeros_like(wins)
+            for start in range(0, len(ranks), rows_per_chunk):
+                chunk = ranks[start : start + rows_per_chunk]
+                above = chunk[:, block, None] < chunk[:, None, :]
+                level = chunk[:, block, None] == chunk[:, None, :]
+                if counts is None:
+                    wins += above.sum(axis=0)
+                    ties += level.sum(axis=0)
+                else:
+                    weights = np.asarray(counts[start : start + rows_per_chunk], dtype=np.int64)
+                    wins += np.einsum("b,bij->ij", weights, above)
+                    ties += np.einsum("b,bij->ij", weights, level)
+
+            # Every candidate has the same position as itself, but that isn't a tie
+            ties[np.arange(len(ties)), np.arange(block_start, block_stop)] = 0
+            if self.sparse:
+                won, tied = wins.nonzero(), ties.nonzero()
+                self._add(
+                    (won[0] + block_start, won[1], wins[won]),
+                    (tied[0] + block_start, tied[1], ties[tied]),
+                )
+            else:
+                self._wins[block, :n] += wins
+                self._ties[block, :n] += ties
+
+    def merge(self, other: "PairwiseTally") -> np.ndarray:
+        """Adds the counts of another tally to this one, interning the candidates of `other` that
+        are new to this tally in `other`'s index order.
+
+        :return: the index in this tally of each candidate index in `other`
+        """
+        mapping = np.fromiter(map(self.intern, other.ids), dtype=np.intp, count=len(other))
+        self._fit()
+        if self.sparse or other.sparse:
+            won, tied = sp.coo_array(other.wins), sp.coo_array(other.ties)
+            self._add(
+                (mapping[won.row], mapping[won.col], won.data),
+                (mapping[tied.row], mapping[tied.col], tied.data),
+            )
+        else:
+            # The mapping has no repeated indices, so the cells can be updated in place
+            cells = np.ix_(mapping, mapping)
+            self._wins[cells] += other.wins
+            self._ties[cells] += other.ties
+        return mapping
+
+    def add_encoded(self, first, second, results):
+        """Counts votes encoded as by `encode`."""
+        self._fit(new_votes=len(results))
+        (winners, losers), (tied1, tied2) = self._split(first, second, results)
+        self._add(
+            (winners, losers, 1),
+            (np.concatenate([tied1, tied2]), np.concatenate([tied2, tied1]), 1),
+        )
+
+    def remove_encoded(self, first, second, results):
+        """Stops counting votes encoded as by `encode`.
+
+        :raises ValueError: if any of the votes was not counted, in which case nothing is removed
+        """
+        (winners, losers), (tied1, tied2) = self._split(first, second, results)
+        tied1, tied2 = np.minimum(tied1, tied2), np.maximum(tied1, tied2)
+        for result, rows, columns in ((0, winners, losers), (2, tied1, tied2)):
+            cells, counts = np.unique(np.stack([rows, columns]), axis=1, return_counts=True)
+            if np.any(self.results(cells[0], cells[1])[result] < counts):
+                raise ValueError("Cannot remove votes that were never counted")
+
+        self._add(
+            (winners, losers, -1),
+            (np.concatenate([tied1, tied2]), np.concatenate([tied2, tied1]), -1),
+        )
+
+    @staticmethod
+    def _split(first, second, results) -> tuple:
+        """:return: the (winners, losers) of the decisive votes, and both sides of the ties."""
+        decisive = results != TIE
+        lost = results == LOSS
+        winners = np.where(lost, second, first)[decisive]
+        losers = np.where(lost, first, second)[decisive]
+        return (winners, losers), (first[~decisive], second[~decisive])
+
+    def _add(self, wins, ties):
+        """Adds to the counts of cells of the matrices, which must cover every interned candidate.
+
+        :param wins: the rows, columns, and amounts to add to the wins matrix. The amounts can be a
+                     single number to add to every cell.
+        :param ties: the rows, columns, and amounts to add to the ties matrix
+        """
+        if self.sparse:
+            self._pending.append((wins, ties))
+        else:
+            np.add.at(self._wins, wins[:2], wins[2])
+            np.add.at(self._ties, ties[:2], ties[2])
+
+    def _flush(self):
+        """Merges the buffered updates into the sparse matrices. This replaces the matrices rather
+        than updating them in place, so matrices that were already returned don't change."""
+        if not self._pending:
+            return
+
+        n = len(self.ids)
+        for name, updates in zip(("_wins", "_ties"), zip(*self._pending)):
+            rows = np.concatenate([u[0] for u in updates])
+            columns = np.concatenate([u[1] for u in updates])
+            counts = np.concatenate([np.broadcast_to(u[2], u[0].shape) for u in updates])
+            delta = sp.coo_array((counts.astype(np.int64), (rows, columns)), shape=(n, n))
+            matrix = getattr(self, name) + delta.tocsr()
+            matrix.eliminate_zeros()
+            setattr(self, name, matrix)
+        self._pending = []
+
+    def _fit(self, new_votes=0):
+        """Grows the matrices to cover every interned candidate. Dense matrices at least double in
+        size, unless there are so many candidates and so few pairs of them have faced each other
+        (counting up to two pairs for each of `new_votes` votes about to be added) that this tally
+        switches to sparse matrices."""
+        n = len(self.ids)
+        if self.sparse:
+            if self._wins.shape[0] < n:
+                self._wins, self._ties = _resized(self._wins, n), _resized(self._ties, n)
+            return
+
+        capacity = len(self._wins)
+        if n <= capacity:
+            return
+
+        if self._choose_storage and n >= SPARSE_MIN_CANDIDATES:
+            observed = np.count_nonzero(self._wins + self._wins.T + self._ties)
+            if observed + 2 * new_votes < SPARSE_MAX_DENSITY * n * n:
+                self.sparse = True
+                self._wins = _resized(sp.csr_array(self._wins), n)
+                self._ties = _resized(sp.csr_array(self._ties), n)
+                return
+
+        capacity = max(n, 2 * capacity)
+        wins = np.zeros((capacity, capacity), dtype=np.int64)
+        ties = np.zeros((capacity, capacity), dtype=np.int64)
+        wins[: len(self._wins), : len(self._wins)] = self._wins
+        ties[: len(self._ties), : len(self._ties)] = self._ties
+        self._wins, self._ties = wins, ties
+
+
+def results_between(wins, ties, first, second) -> tuple:
+    """:return: the number of wins, losses, and ties of each candidate index in `first` against the
+    candidate index at the same position in `second`, looked up in dense or sparse matrices."""
+    first, second = np.asarray(first, dtype=np.intp), np.asarray(second, dtype=np.intp)
+    if not len(first):
+        return tuple(np.zeros(0, dtype=np.int64) for _ in range(3))
+    return wins[first, second], wins[second, first], ties[first, second]
+
+
+def _resized(matrix: sp.csr_array, n: int) -> sp.csr_array:
+    """:return: a copy of a sparse matrix with more rows and columns, that shares its storage."""
+    extra_rows = np.full(n - matrix.shape[0], matrix.indptr[-1], dtype=matrix.indptr.dtype)
+    return sp.csr_array(
+        (matrix.data, matrix.indices, np.concatenate([matrix.indptr, extra_rows])), shape=(n, n)
+    )
+
+
+class MatchupView(Mapping):
+    """A read-only snapshot of a tally, in the shape returned by `BallotBox.get_matchups`.
+
+    Matchups are looked up in the snapshotted matrices on access, so creating the view is O(C²)
+    array copying, rather than O(C²) Python dictionaries.
+    """
+
+    def __init__(self, tally: PairwiseTally):
+        self._ids = list(tally.ids)
+        self._index = dict(tally.index)
+        self._wins = tally.wins.copy()
+        self._ties = tally.ties.copy()
+
+    def __getitem__(self, candidate):
+        return _OpponentView(self, self._index[candidate])
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __repr__(self):
+        return repr({candidate: dict(opponents) for candidate, opponents in self.items()})
+
+
+class _OpponentView(Mapping):
+    """The matchups of a single candidate against every other candidate in a `MatchupView`."""
+
+    def __init__(self, matchups: MatchupView, i: int):
+        self._matchups = matchups
+        self._i = i
+
+    def __getitem__(self, opponent):
+        i, j = self._i, self._matchups._index[opponent]
+        if i == j:
+            raise KeyError(opponent)
+
+        wins, ties = self._matchups._wins, self._matchups._ties
+        return {"wins": int(wins[i, j]), "losses": int(wins[j, i]), "ties": int(ties[i, j])}
+
+    def __iter__(self):
+        return (c for j, c in enumerate(self._matchups._ids) if j != self._i)
+
+    def __len__(self):
+        return len(self._matchups._ids) - 1
+
+    def __repr__(self):
+        return repr(dict(self))
@@ -0,0 +1,206 @@
+"""
+Compact, columnar storage for pairwise votes.
+
+Rather than keeping each vote as a Python tuple, a VoteStore keeps one array per field: the indices
+of the two candidates (int32), the result code (int8), and optionally the index of the voter
+(int32). That is 9 or 13 bytes per vote, instead of the 100+ bytes of a tuple of Python objects.
+The original ids are recovered through lookup tables when votes are decoded.
+"""
+
+import numpy as np
+
+from socialchoice.tally import WIN, LOSS, TIE
+
+RESULT_NAMES = ("win", "loss", "tie")
+"""The result of each result code, such that `RESULT_NAMES[code]` is the result of `code`."""
+
+
+class VoteStore:
+    """Pairwise votes, stored column by column as arrays of interned ids."""
+
+    def __init__(self, candidate_ids: list, track_voters=False):
+        """
+        :param candidate_ids: the lookup table from candidate index to candidate id. This is shared
+                              with whatever interns the candidates, such as a `PairwiseTally`, and
+                              may grow as new candidates are interned.
+        :param track_voters: whether votes have a fourth field, the id of the voter
+        """
+        self.candidate_ids = candidate_ids
+        self.voter_ids = [] if track_voters else None
+        self.voter_index = {}
+        self._chunks = []
+        self._retracted = []
+        # The sorted distinct keys of the stored (vote, voter) pairs and the count of each, built the
+        # first time a vote is retracted, along with the numbers of candidates and voters they were
+        # computed for.
+        self._cast = None
+
+    @property
+    def tracks_voters(self) -> bool:
+        return self.voter_ids is not None
+
+    def __len__(self):
+        return sum(len(chunk[0]) for chunk in self._chunks) - sum(
+            len(chunk[0]) for chunk in self._retracted
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """:return: the number of bytes used by the stored columns."""
+        return sum(column.nbytes for chunk in self._chunks for column in chunk)
+
+    def intern_voter(self, voter) -> int:
+        """:return: the index of `voter`, assigning it the next free index if it is new."""
+        try:
+            return self.voter_index[voter]
+        except KeyError:
+            index = self.voter_index[voter] = len(self.voter_ids)
+            self.voter_ids.append(voter)
+            return index
+
+    def encode_voters(self, voters, intern=True) -> np.ndarray:
+        """Encodes voter ids as an array of voter indices.
+
+        :param intern: whether to intern voters that have not been seen before
+        :raises KeyError: if `intern` is False and a voter has not been seen before
+        """
+        voters = list(voters)
+        to_index = self.intern_voter if intern else self.voter_index.__getitem__
+        return np.fromiter(map(to_index, voters), dtype=np.int32, count=len(voters))
+
+    def append(self, first, second, results, voters=None):
+        """Stores votes encoded as in `PairwiseTally.encode`, along with the voter indices if this
+        store tracks voters."""
+        chunk = (
+            np.asarray(first, dtype=np.int32),
+            np.asarray(second, dtype=np.int32),
+            np.asarray(results, dtype=np.int8),
+        )
+        if self.tracks_voters:
+            chunk += (np.asarray(voters, dtype=np.int32),)
+        if len(chunk[0]):
+            self._chunks.append(chunk)
+            if self._cast is not None:
+                sizes, keys, counts = self._cast
+                if sizes == self._sizes():
+                    added_keys, added_counts = np.unique(
+                        _row_keys(chunk, *sizes), return_counts=True
+                    )
+                    keys, merged = np.unique(
+                        np.concatenate((keys, added_keys)), return_inverse=True
+                    )
+                    counts = np.bincount(merged, np.concatenate((counts, added_counts)))
+                    self._cast = (sizes, keys, counts.astype(np.int64))
+                else:
+                    self._cast = None
+
+    def retract(self, first, second, results, voters=None):
+        """Marks encoded votes as removed. Each removes the most recently stored vote with the same
+        effect on the tallies (and the same voter, if this store tracks voters). They are removed
+        from the columns the next time the columns are read.
+
+        If this store tracks voters, checks that each retracted vote was placed by that voter. If
+        not, the caller is responsible for checking that the votes were stored, for example with
+        `PairwiseTally.remove_encoded`.
+
+        :raises ValueError: if this store tracks voters, and any vote was not placed by its voter,
+                            in which case none of the votes are retracted
+        """
+        chunk = (
+            np.asarray(first, dtype=np.int32),
+            np.asarray(second, dtype=np.int32),
+            np.asarray(results, dtype=np.int8),
+        )
+        if self.tracks_voters:
+            chunk += (np.asarray(voters, dtype=np.int32),)
+            sizes = self._sizes()
+            if self._cast is None or self._cast[0] != sizes:
+                self._cast = (
+                    sizes,
+                    *np.unique(_row_keys(self.columns(), *sizes), return_counts=True),
+                )
+            keys, counts = self._cast[1:]
+
+            retracted, retracted_counts = np.unique(_row_keys(chunk, *sizes), return_counts=True)
+            at = np.searchsorted(keys, retracted)
+            placed = at < len(keys)
+            placed[placed] = keys[at[placed]] == retracted[placed]
+            if not placed.all() or (counts[at] < retracted_counts).any():
+                raise ValueError("Cannot remove votes that were never placed")
+            counts[at] -= retracted_counts
+
+        if len(chunk[0]):
+            self._retracted.append(chunk)
+
+    def _sizes(self) -> tuple:
+        """:return: the numbers of candidates and voters that row keys are computed for."""
+        return len(self.candidate_ids), len(self.voter_ids or ())
+
+    def columns(self) -> tuple:
+        """:return: the stored votes as a tuple of columns: the first candidates, the second
+        candidates, the results, and the voters if this store tracks voters."""
+        width = 4 if self.tracks_voters else 3
+        if not self._chunks:
+            return tuple(np.zeros(0, dtype=np.int8 if i == 2 else np.int32) for i in range(width))
+
+        if len(self._chunks) > 1:
+            self._chunks = [tuple(np.concatenate(column) for column in zip(*self._chunks))]
+        if self._retracted:
+            self._chunks = [self._without_retracted(self._chunks[0])]
+        return self._chunks[0]
+
+    def decode(self) -> list:
+        """:return: the stored votes as a list of tuples of the original ids, in the order they were
+        stored."""
+        columns = self.columns()
+        decoded = [
+            list(map(self.candidate_ids.__getitem__, columns[0].tolist())),
+            list(map(self.candidate_ids.__getitem__, columns[1].tolist())),
+            list(map(RESULT_NAMES.__getitem__, columns[2].tolist())),
+        ]
+        if self.tracks_voters:
+            decoded.append(list(map(self.voter_ids.__getitem__, columns[3].tolist())))
+        return list(zip(*decoded))
+
+    def _without_retracted(self, chunk) -> tuple:
+        """:return: the given columns, without the latest vote matching each retracted vote."""
+        retracted = [np.concatenate(column) for column in zip(*self._retracted)]
+        self._retracted = []
+
+        keys = _row_keys(chunk, *self._sizes())
+        retracted_keys, retracted_counts = np.unique(
+            _row_keys(retracted, *self._sizes()), return_counts=True
+        )
+
+        # Walking backwards from the most recent vote, find each vote's rank among the votes with
+        # the same key, and drop it if that rank is lower than the number of retractions.
+        newest_first = np.flatnonzero(np.isin(keys, retracted_keys))[::-1]
+        order = np.argsort(keys[newest_first], kind="stable")
+        sorted_keys = keys[newest_first][order]
+        rank = np.arange(len(sorted_keys)) - np.searchsorted(sorted_keys, sorted_keys)
+        limit = retracted_counts[np.searchsorted(retracted_keys, sorted_keys)]
+
+        keep = np.ones(len(keys), dtype=bool)
+        keep[newest_first[order[rank < limit]]] = False
+        return tuple(column[keep] for column in chunk)
+
+
+def _canonicalize(first, second, results) -> tuple:
+    """:return: encoded votes rewritten so that votes with the same effect on the tallies are
+    identical: losses become wins for the other candidate, and ties list the lower index first."""
+    lost = results == LOSS
+    swap = lost | ((results == TIE) & (second < first))
+    return (
+        np.where(swap, second, first).astype(np.int64),
+        np.where(swap, first, second).astype(np.int64),
+        np.where(lost, WIN, results).astype(np.int64),
+    )
+
+
+def _row_keys(chunk, n_candidates, n_voters) -> np.ndarray:
+    """:return: one integer per row, equal for rows that are equal after canonicalization."""
+    first, second, results = _canonicalize(*chunk[:3])
+    keys = (first * n_candidates + second) * 3 + results
+    if len(chunk) > 3:
+        keys = keys * max(n_voters, 1) + chunk[3]
+    return keys
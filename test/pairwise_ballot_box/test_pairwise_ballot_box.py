@@ -1,6 +1,12 @@
 import pytest
 
-from socialchoice import PairwiseBallotBox, InvalidBallotDataException
+from socialchoice import (
+    PairwiseBallotBox,
+    InvalidBallotDataException,
+    nx,
+    parallel_tally,
+    parallel_tally_csv,
+)
 
 empty_votes = PairwiseBallotBox([])
 example_votes = PairwiseBallotBox(
@@ -95,3 +101,143 @@ def test_throws_error_on_wrong_ballot_length():
         PairwiseBallotBox([("a", "b", "foo")])
 
     PairwiseBallotBox([("a", "b", "win"), ("a", "b", "loss"), ("a", "b", "tie")])
+
+
+def test_throws_error_on_unknown_candidate():
+    with pytest.raises(InvalidBallotDataException):
+        PairwiseBallotBox([("a", "b", "win"), ("a", "c", "win")], candidates={"a", "b"})
+
+    matchups = PairwiseBallotBox([("a", "b", "win")], candidates={"a", "b", "c"}).get_matchups()
+    assert matchups["c"] == {
+        "a": {"wins": 0, "losses": 0, "ties": 0},
+        "b": {"wins": 0, "losses": 0, "ties": 0},
+    }
+
+
+def test_derived_views_are_cached_and_read_only():
+    assert example_votes.get_matchups() is example_votes.get_matchups()
+    assert example_votes.get_matchup_graph() is example_votes.get_matchup_graph()
+    assert example_votes.get_victory_graph() is example_votes.get_victory_graph()
+
+    with pytest.raises(nx.NetworkXError):
+        example_votes.get_victory_graph().remove_edge(0, 1)
+
+    with pytest.raises(TypeError):
+        example_votes.get_matchups()[0] = {}
+
+    # Copies are safe to modify
+    victory_graph = example_votes.get_victory_graph().copy()
+    victory_graph.remove_edge(0, 1)
+    assert (0, 1) in example_votes.get_victory_graph().edges
+
+
+def test_add_votes_matches_constructing_from_all_votes():
+    votes = [[0, 1, "win"], [3, 2, "loss"], [2, 3, "win"], [0, 3, "tie"], [3, 0, "win"]]
+    ballots = PairwiseBallotBox(votes[:2])
+    matchups_before = ballots.get_matchups()
+
+    ballots.add_votes(votes[2:])
+    assert ballots.get_matchups() == example_votes.get_matchups()
+    assert ballots.get_candidates() == {0, 1, 2, 3}
+    assert ballots.ballots == [tuple(vote) for vote in votes]
+    # Views handed out before the votes were added are not changed
+    assert matchups_before[3][2] == {"wins": 0, "losses": 1, "ties": 0}
+
+
+def test_add_votes_is_atomic():
+    ballots = PairwiseBallotBox([("a", "b", "win")])
+    with pytest.raises(InvalidBallotDataException):
+        ballots.add_votes([("a", "c", "win"), ("a", "b", "foo")])
+
+    assert ballots.get_candidates() == {"a", "b"}
+    assert ballots.ballots == [("a", "b", "win")]
+
+
+def test_remove_votes():
+    ballots = PairwiseBallotBox([(0, 1, "win"), (1, 2, "tie"), (0, 1, "win"), (0, 2, "loss")])
+    ballots.remove_votes([(1, 0, "loss"), (2, 1, "tie")])
+
+    assert ballots.get_matchups()[0][1] == {"wins": 1, "losses": 0, "ties": 0}
+    assert ballots.get_matchups()[1][2] == {"wins": 0, "losses": 0, "ties": 0}
+    assert ballots.ballots == [(0, 1, "win"), (0, 2, "loss")]
+
+
+def test_remove_votes_that_were_never_placed():
+    ballots = PairwiseBallotBox([(0, 1, "win"), (1, 2, "tie")])
+
+    with pytest.raises(InvalidBallotDataException):
+        ballots.remove_votes([(0, 1, "loss")])
+
+    with pytest.raises(InvalidBallotDataException):
+        ballots.remove_votes([(0, 1, "win"), (0, 1, "win")])
+
+    with pytest.raises(InvalidBallotDataException):
+        ballots.remove_votes([(0, 3, "win")])
+
+    assert ballots.ballots == [(0, 1, "win"), (1, 2, "tie")]
+
+
+def test_streaming_construction():
+    def votes():
+        yield from [[0, 1, "win"], [3, 2, "loss"], [2, 3, "win"], [0, 3, "tie"], [3, 0, "win"]]
+
+    streamed = PairwiseBallotBox(votes(), chunk_size=2)
+    assert streamed.get_matchups() == example_votes.get_matchups()
+    assert streamed.ballots == example_votes.ballots
+
+    tally_only = PairwiseBallotBox(votes(), keep_votes=False, chunk_size=2)
+    assert tally_only.get_matchups() == example_votes.get_matchups()
+    with pytest.raises(ValueError):
+        tally_only.ballots
+
+    tally_only.remove_votes([[0, 1, "win"]])
+    assert tally_only.get_matchups()[0][1] == {"wins": 0, "losses": 0, "ties": 0}
+
+
+def test_votes_are_stored_compactly():
+    ballots = PairwiseBallotBox([("alice", "bob", "win"), ("carol", "bob", "tie")] * 1000)
+
+    assert len(ballots.vote_store) == 2000
+    assert ballots.vote_store.nbytes == 2000 * 9
+    assert ballots.ballots[-2:] == [("alice", "bob", "win"), ("carol", "bob", "tie")]
+
+
+def test_parallel_tally_matches_serial_tally():
+    votes = [(i % 7, (i * 3) % 11, ["win", "loss", "tie"][i % 3]) for i in range(1000)]
+    votes = [vote for vote in votes if vote[0] != vote[1]]
+    serial = PairwiseBallotBox(votes)
+
+    ballots = parallel_tally(iter(votes), workers=2, shard_size=64)
+    assert ballots.tally.ids == serial.tally.ids
+    assert ballots.get_matchups() == serial.get_matchups()
+    assert ballots.ballots == serial.ballots
+
+    with pytest.raises(InvalidBallotDataException):
+        parallel_tally(votes + [(1, 2, "draw")], workers=2, shard_size=64)
+
+
+def test_parallel_tally_csv_matches_loading_the_file(tmp_path):
+    path = tmp_path / "votes.csv"
+    votes = [(f"c{i % 7}", f"c{(i * 3) % 11}", ["win", "loss", "tie"][i % 3]) for i in range(500)]
+    votes = [vote for vote in votes if vote[0] != vote[1]]
+    path.write_text("first,second,result\n" + "".join(",".join(v) + "\n" for v in votes))
+
+    # Shards much shorter than a line, and ones that split lines anywhere
+    for shard_bytes in [3, 17, 64, 10_000]:
+        ballots = parallel_tally_csv(path, workers=2, header=True, shard_bytes=shard_bytes)
+        assert ballots.ballots == votes
+        assert ballots.get_matchups() == PairwiseBallotBox(votes).get_matchups()
+
+
+def test_sparse_tally_graphs(monkeypatch):
+    monkeypatch.setattr("socialchoice.tally.SPARSE_MIN_CANDIDATES", 4)
+    monkeypatch.setattr("socialchoice.tally.SPARSE_MAX_DENSITY", 0.5)
+    votes = [(i, i + 1, "win") for i in range(20)] + [(3, 2, "win"), (3, 2, "win"), (5, 6, "tie")]
+    ballots = PairwiseBallotBox(votes)
+    assert ballots.tally.sparse
+
+    expected_edges = {(i, i + 1) for i in range(20) if i != 2} | {(3, 2)}
+    assert set(ballots.get_victory_graph().edges) == expected_edges
+    assert ballots.get_matchup_graph().number_of_edges() == 40
+    assert ballots.get_matchups()[3][2] == {"wins": 2, "losses": 1, "ties": 0}
+    assert ballots.get_matchups()[0][20] == {"wins": 0, "losses": 0, "ties": 0}
@@ -1,6 +1,14 @@
 import pytest
+from hypothesis import given
+from hypothesis import strategies as st
 
-from socialchoice import RankedChoiceBallotBox, Election
+from socialchoice import (
+    RankedChoiceBallotBox,
+    Election,
+    PairwiseBallotBox,
+    InvalidBallotDataException,
+)
+from socialchoice.util import ranking_to_pairwise_ballots
 
 
 @pytest.fixture
@@ -25,3 +33,56 @@ def test_copeland_on_ranked_choice(election):
 
     ranking_no_score = election.ranking_by_copeland()
     assert ranking_no_score == [1, 2, 3, 4]
+
+
+def test_matchups_match_pairwise_expansion():
+    ballots = [[1, 2, 3, 4], [1, {2, 3}, 4], [{1, 2, 3, 4}], [4, 3, 2, 1]]
+    pairwise_ballots = [vote for ballot in ballots for vote in ranking_to_pairwise_ballots(ballot)]
+
+    assert RankedChoiceBallotBox(ballots).get_matchups() == (
+        PairwiseBallotBox(pairwise_ballots).get_matchups()
+    )
+
+
+@given(st.permutations(range(6)), st.integers(min_value=1, max_value=5))
+def test_tallies_direct_from_positions(ranking, copies):
+    matchups = RankedChoiceBallotBox([list(ranking)] * copies).get_matchups()
+    for i, winner in enumerate(ranking):
+        for loser in ranking[i + 1 :]:
+            assert matchups[winner][loser] == {"wins": copies, "losses": 0, "ties": 0}
+
+
+def test_identical_ballots_are_stored_once():
+    ballots = RankedChoiceBallotBox([[1, 2, 3], [1, {2}, 3], [{3}, 2, 1], [1, 2, 3]])
+
+    assert ballots.get_weighted_orderings() == [
+        ((frozenset({1}), frozenset({2}), frozenset({3})), 3),
+        ((frozenset({3}), frozenset({2}), frozenset({1})), 1),
+    ]
+    assert len(ballots.ranks) == 2
+    assert ballots.get_orderings() == [[{1}, {2}, {3}]] * 2 + [[{3}, {2}, {1}], [{1}, {2}, {3}]]
+    assert ballots.get_matchups()[1][3] == {"wins": 3, "losses": 1, "ties": 0}
+
+
+def test_orderings_keep_the_order_ballots_were_cast_in():
+    ballots = RankedChoiceBallotBox([[1, 2], [2, 1], [1, {2}]])
+
+    assert ballots.get_orderings() == [[{1}, {2}], [{2}, {1}], [{1}, {2}]]
+    with pytest.warns(DeprecationWarning):
+        assert ballots.ballots == ballots.get_orderings()
+
+
+def test_empty_ties_do_not_take_up_a_position():
+    ballots = RankedChoiceBallotBox([[set(), 1, 2], [2, 1], [1, set(), 2]])
+
+    assert ballots.get_orderings() == [[{1}, {2}], [{2}, {1}], [{1}, {2}]]
+    assert ballots.ranks.max() == 1
+    election = Election(ballots)
+    assert election.ranking_by_borda_count() == [1, 2]
+    assert election.ranking_by_plurality() == [1, 2]
+    assert election.ranking_by_instant_runoff() == [1, 2]
+
+
+def test_invalid_ballot_with_ties_is_shown_as_sets():
+    with pytest.raises(InvalidBallotDataException, match=r"Ballot \[\{1, 2\}\] did not contain"):
+        RankedChoiceBallotBox([[1, 2, 3], [{1, 2}]])
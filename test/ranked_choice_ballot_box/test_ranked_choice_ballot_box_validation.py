@@ -45,3 +45,19 @@ def test_rankings_can_include_ties():
     RankedChoiceBallotBox([[{1, 2}]])
 
     RankedChoiceBallotBox([[1, {2, 4}, {3, 5}]])
+
+
+def test_validation_checks_each_distinct_ballot():
+    with pytest.raises(InvalidBallotDataException):
+        RankedChoiceBallotBox([[1, 2, 3]] * 10 + [[1, 2, {3, 2}]])
+
+    with pytest.raises(InvalidBallotDataException):
+        RankedChoiceBallotBox([[1, 2, 3]] * 10 + [[1, 2, 4]], candidates=[1, 2, 3])
+
+    with pytest.raises(InvalidBallotDataException):
+        RankedChoiceBallotBox([[1, 2, 3]] * 10 + [(3, 2, 1)])
+
+
+def test_trusted_ballots_are_not_validated():
+    ballots = RankedChoiceBallotBox([[1, 2, 3], (3, {1, 2})], trusted=True)
+    assert ballots.get_matchups()[3][1] == {"wins": 1, "losses": 1, "ties": 0}
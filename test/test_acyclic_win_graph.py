@@ -0,0 +1,37 @@
+import random
+
+import networkx as nx
+
+from socialchoice.induction.acyclic_win_graph import AcyclicWinGraph
+
+
+def test_refuses_edges_that_would_create_a_cycle():
+    win_graph = nx.DiGraph([(1, 2)])
+    acyclic = AcyclicWinGraph(win_graph)
+
+    assert acyclic.add_edge(2, 3)
+    assert not acyclic.add_edge(3, 1)
+    assert not acyclic.add_edge(4, 4)
+    assert acyclic.add_edge(1, 3)
+    assert list(win_graph.nodes) == [1, 2, 3, 4]
+    assert list(win_graph.edges) == [(1, 2), (1, 3), (2, 3)]
+
+
+def test_adds_the_same_edges_as_searching_for_cycles():
+    rng = random.Random(0)
+    for _ in range(50):
+        edges = [(rng.randrange(10), rng.randrange(10)) for _ in range(40)]
+
+        expected = nx.DiGraph()
+        for winner, loser in edges:
+            expected.add_edge(winner, loser)
+            if not nx.is_directed_acyclic_graph(expected):
+                expected.remove_edge(winner, loser)
+
+        win_graph = nx.DiGraph()
+        acyclic = AcyclicWinGraph(win_graph)
+        for winner, loser in edges:
+            acyclic.add_edge(winner, loser)
+
+        assert list(win_graph.nodes) == list(expected.nodes)
+        assert list(win_graph.edges) == list(expected.edges)
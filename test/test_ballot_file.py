@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from socialchoice import (
+    PairwiseBallotBox,
+    VoterTrackingPairwiseBallotBox,
+    RankedChoiceBallotBox,
+    InvalidBallotDataException,
+    write_ballot_file,
+)
+from socialchoice.ballot_file import read_ballot_file, write_votes, write_rankings, RANKED
+
+
+def test_pairwise_roundtrip(tmp_path):
+    votes = [("a", "b", "win"), ("c", "a", "tie"), ("b", "c", "loss"), (1, "a", "win")]
+    write_ballot_file(tmp_path / "votes.bin", PairwiseBallotBox(votes))
+
+    ballots = PairwiseBallotBox.from_file(tmp_path / "votes.bin")
+    assert ballots.ballots == votes
+    assert ballots.get_candidates() == {"a", "b", "c", 1}
+    assert ballots.get_matchups() == PairwiseBallotBox(votes).get_matchups()
+
+
+def test_loaded_votes_are_views_of_the_file(tmp_path):
+    write_ballot_file(tmp_path / "votes.bin", PairwiseBallotBox([("a", "b", "win")] * 10))
+
+    ballots = PairwiseBallotBox.from_file(tmp_path / "votes.bin")
+    first = ballots.vote_store.columns()[0]
+    assert not first.flags.owndata and not first.flags.writeable
+
+    # Votes can still be added to and removed from a loaded ballot box
+    ballots.add_votes([("b", "a", "win")])
+    ballots.remove_votes([("a", "b", "win")] * 2)
+    assert ballots.get_matchups()["a"]["b"] == {"wins": 8, "losses": 1, "ties": 0}
+
+
+def test_voter_tracking_roundtrip(tmp_path):
+    votes = [(1, 2, "win", "v1"), (2, 3, "loss", "v2"), (3, 1, "tie", "v1")]
+    write_ballot_file(tmp_path / "votes.bin", VoterTrackingPairwiseBallotBox(votes))
+
+    ballots = VoterTrackingPairwiseBallotBox.from_file(tmp_path / "votes.bin")
+    assert ballots.votes == votes
+    assert ballots.get_matchups() == VoterTrackingPairwiseBallotBox(votes).get_matchups()
+
+    ballots.remove_votes([(1, 2, "win", "v1")])
+    with pytest.raises(InvalidBallotDataException):
+        ballots.remove_votes([(2, 3, "loss", "v1")])
+
+
+def test_ranked_roundtrip(tmp_path):
+    ballots = [[1, 2, 3], [{1, 2}, 3], [1, 2, 3], [3, {1, 2}]]
+    write_ballot_file(tmp_path / "ballots.bin", RankedChoiceBallotBox(ballots))
+
+    loaded = RankedChoiceBallotBox.from_file(tmp_path / "ballots.bin")
+    expected = RankedChoiceBallotBox(ballots)
+    assert loaded.get_weighted_orderings() == expected.get_weighted_orderings()
+    assert loaded.get_matchups() == expected.get_matchups()
+    assert not loaded.ranks.flags.owndata
+
+
+def test_cannot_write_without_votes(tmp_path):
+    with pytest.raises(ValueError):
+        ballots = PairwiseBallotBox([(1, 2, "win")], keep_votes=False)
+        write_ballot_file(tmp_path / "votes.bin", ballots)
+
+    with pytest.raises(ValueError):
+        write_ballot_file(tmp_path / "votes.bin", PairwiseBallotBox([((1, 2), 3, "win")]))
+
+
+def test_invalid_files(tmp_path):
+    write_ballot_file(tmp_path / "ballots.bin", RankedChoiceBallotBox([[1, 2]]))
+    assert read_ballot_file(tmp_path / "ballots.bin").kind == RANKED
+    with pytest.raises(InvalidBallotDataException):
+        PairwiseBallotBox.from_file(tmp_path / "ballots.bin")
+
+    (tmp_path / "garbage.bin").write_bytes(b"not a ballot file, but long enough to have a header")
+    with pytest.raises(InvalidBallotDataException):
+        PairwiseBallotBox.from_file(tmp_path / "garbage.bin")
+
+    write_votes(tmp_path / "votes.bin", ["a", "b"], np.array([0]), np.array([2]), np.array([0]))
+    with pytest.raises(InvalidBallotDataException):
+        PairwiseBallotBox.from_file(tmp_path / "votes.bin")
+
+    contents = (tmp_path / "ballots.bin").read_bytes()
+    (tmp_path / "truncated.bin").write_bytes(contents[:-1])
+    with pytest.raises(InvalidBallotDataException):
+        RankedChoiceBallotBox.from_file(tmp_path / "truncated.bin")
+
+
+def test_ranked_file_with_gaps_in_positions_is_invalid(tmp_path):
+    write_rankings(tmp_path / "gaps.bin", ["a", "b", "c"], np.array([[0, 2, 1], [0, 2, 2]]), [1, 1])
+    with pytest.raises(InvalidBallotDataException, match="gaps"):
+        RankedChoiceBallotBox.from_file(tmp_path / "gaps.bin")
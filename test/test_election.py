@@ -1,6 +1,21 @@
+import itertools
+import random
+import time
+import tracemalloc
+
+import networkx as nx
 import pytest
 
-from socialchoice import Election, PairwiseBallotBox, RankedChoiceBallotBox
+from socialchoice import (
+    Election,
+    PairwiseBallotBox,
+    RankedChoiceBallotBox,
+    PAIRWISE_METHODS,
+    ORDERING_METHODS,
+)
+from socialchoice.graph import PairwiseGraph
+from socialchoice.methods import kemeny, schulze
+from socialchoice.tally import SPARSE_MIN_CANDIDATES, PairwiseTally
 
 empty_election = Election(PairwiseBallotBox([]))
 example_votes = PairwiseBallotBox(
@@ -8,6 +23,15 @@ example_votes = PairwiseBallotBox(
 )
 
 
+def _traced(function, *args, **kwargs) -> tuple:
+    """:return: the result of calling `function`, and the peak memory allocated while it ran."""
+    tracemalloc.start()
+    try:
+        return function(*args, **kwargs), tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
 def test_get_ranked_pairs_ranking():
     """Tests that ranked_pairs on a pairwise ballot box produces the correct outcome."""
     assert empty_election.ranking_by_ranked_pairs() == []
@@ -16,6 +40,45 @@ def test_get_ranked_pairs_ranking():
     assert e_1.ranking_by_ranked_pairs() == [2, 3, 0, 1]
 
 
+def test_ranked_pairs_locks_the_same_edges_as_searching_for_cycles():
+    rng = random.Random(0)
+    for _ in range(50):
+        votes = [[*rng.sample(range(7), 2), rng.choice(["win", "loss", "tie"])] for _ in range(40)]
+        election = Election(PairwiseBallotBox(votes))
+        victory_graph = election.ballot_box.get_victory_graph()
+
+        expected = nx.DiGraph()
+        expected.add_nodes_from(victory_graph)
+        order = list(victory_graph)
+        edges = sorted(
+            victory_graph.edges(data="margin"),
+            key=lambda e: (-e[2], order.index(e[0]), order.index(e[1])),
+        )
+        for u, v, _ in edges:
+            if not nx.has_path(expected, v, u):
+                expected.add_edge(u, v)
+
+        locked = election.ranked_pairs_graph()
+        assert set(locked.edges) == set(expected.edges)
+        ranking = election.ranking_by_ranked_pairs()
+        assert all(ranking.index(u) < ranking.index(v) for u, v in locked.edges)
+
+
+@pytest.mark.slow
+def test_ranked_pairs_of_thousands_of_candidates_takes_seconds():
+    # Random rankings, so the margins are random, and every pair of candidates has a victory edge
+    rng = random.Random(0)
+    candidates = list(range(5000))
+    election = Election(RankedChoiceBallotBox([rng.sample(candidates, 5000) for _ in range(51)]))
+    election.ballot_box.get_pairwise_graph()
+
+    start = time.perf_counter()
+    ranking = election.ranking_by_ranked_pairs()
+    # About 9 seconds on one core when this was written
+    assert time.perf_counter() - start < 30
+    assert sorted(ranking) == candidates
+
+
 def test_get_win_ratio():
     assert empty_election.ranking_by_win_ratio() == []
 
@@ -28,6 +91,179 @@ def test_get_win_ratio():
     ]
 
 
+def test_get_copeland():
+    assert empty_election.ranking_by_copeland() == []
+
+    e_1 = Election(example_votes)
+    assert e_1.ranking_by_copeland(include_score=True) == [(2, 1), (0, 0), (3, 0), (1, -1)]
+
+
+def test_get_minimax():
+    assert empty_election.ranking_by_minimax() == []
+
+    e_1 = Election(example_votes)
+    assert e_1.ranking_by_minimax() == [2, 0, 3, 1]
+    assert e_1.ranking_by_minimax(include_score=True) == [(2, 0.0), (0, 0.5), (3, 1.0), (1, 1.0)]
+
+    # A candidate that has never faced anyone has no worst defeat
+    e_2 = Election(PairwiseBallotBox([[0, 1, "win"]], candidates=[0, 1, 2]))
+    assert e_2.ranking_by_minimax(include_score=True) == [(0, 0.0), (2, 0.0), (1, 1.0)]
+
+
+def test_get_schulze():
+    assert empty_election.ranking_by_schulze() == []
+
+    # The example from the Wikipedia article on the Schulze method
+    ballots = RankedChoiceBallotBox(
+        [list("ACBED")] * 5
+        + [list("ADECB")] * 5
+        + [list("BEDAC")] * 8
+        + [list("CABED")] * 3
+        + [list("CAEBD")] * 7
+        + [list("CBADE")] * 2
+        + [list("DCEBA")] * 7
+        + [list("EBADC")] * 8
+    )
+    election = Election(ballots)
+    assert election.ranking_by_schulze() == list("EACBD")
+    assert election.ranking_by_schulze(include_score=True)[0] == ("E", 4)
+
+
+def test_schulze_strongest_paths_match_floyd_warshall(monkeypatch):
+    # Small blocks, so that the election spans several blocks and row chunks
+    monkeypatch.setattr(schulze, "BLOCK_SIZE", 3)
+    monkeypatch.setattr(schulze, "ROW_CHUNK", 2)
+    rng = random.Random(0)
+    for _ in range(20):
+        votes = [[*rng.sample(range(10), 2), rng.choice(["win", "loss", "tie"])] for _ in range(80)]
+        graph = PairwiseBallotBox(votes).get_pairwise_graph()
+        strengths = schulze.link_strengths(graph)[0]
+
+        expected = strengths.copy()
+        for k in range(len(expected)):
+            for i in range(len(expected)):
+                for j in range(len(expected)):
+                    expected[i, j] = max(expected[i, j], min(expected[i, k], expected[k, j]))
+        assert (schulze.strongest_paths(strengths) == expected).all()
+
+
+def test_schulze_on_sparse_tallies():
+    rng = random.Random(0)
+    for _ in range(20):
+        votes = [[*rng.sample(range(30), 2), rng.choice(["win", "loss", "tie"])] for _ in range(40)]
+        scores = []
+        for sparse in (False, True):
+            tally = PairwiseTally(range(30), sparse=sparse)
+            tally.add_votes(votes)
+            scores.append(schulze.schulze_scores(PairwiseGraph(tally)))
+        assert (scores[0] == scores[1]).all()
+
+    # A chain of more candidates than a dense tally is kept for, with a cycle at the top
+    n = SPARSE_MIN_CANDIDATES + 52
+    ballots = PairwiseBallotBox([[i, i + 1, "win"] for i in range(n - 1)] + [[2, 0, "win"]])
+    assert ballots.tally.sparse
+    ranking, peak = _traced(Election(ballots).ranking_by_schulze, include_score=True)
+    # Far less memory than a single dense C×C matrix
+    assert peak < n * n
+    assert ranking[:4] == [(0, n - 3), (1, n - 3), (2, n - 3), (3, n - 4)]
+    assert [candidate for candidate, _ in ranking] == list(range(n))
+
+
+def test_get_kemeny():
+    assert empty_election.ranking_by_kemeny() == []
+
+    ballots = RankedChoiceBallotBox([[1, 2, 3, 4]] * 3 + [[4, 3, 2, 1]] * 2 + [[1, {2, 3}, 4]])
+    election = Election(ballots)
+    assert election.ranking_by_kemeny(include_score=True) == [(1, 3), (2, 2), (3, 1), (4, 0)]
+
+
+def test_kemeny_solvers_find_the_best_ranking():
+    rng = random.Random(0)
+    for n in range(1, 8):
+        votes = [[*rng.sample(range(n), 2), "win"] for _ in range(30)] if n > 1 else []
+        graph = PairwiseBallotBox(votes, candidates=range(n)).get_pairwise_graph()
+        support = kemeny.support_matrix(graph)
+
+        best = max(kemeny.agreement(support, p) for p in itertools.permutations(range(n)))
+        assert kemeny.agreement(support, kemeny.exact_ranking(support)) == best
+        local_search = kemeny.local_search_ranking(support, time_limit=0.1)
+        assert sorted(local_search) == list(range(n))
+        assert kemeny.agreement(support, local_search) <= best
+
+
+def test_kemeny_uses_local_search_for_many_candidates(monkeypatch):
+    monkeypatch.setattr(kemeny, "EXACT_MAX_CANDIDATES", 3)
+    ballots = RankedChoiceBallotBox([[1, 2, 3, 4, 5, 6]] * 2 + [[2, 1, 3, 4, 6, 5]])
+    assert Election(ballots).ranking_by_kemeny(time_limit=0.1) == [1, 2, 3, 4, 5, 6]
+
+
+def test_kemeny_on_sparse_tallies():
+    rng = random.Random(0)
+    for _ in range(10):
+        votes = [[*rng.sample(range(6), 2), rng.choice(["win", "loss", "tie"])] for _ in range(20)]
+        supports = []
+        for sparse in (False, True):
+            tally = PairwiseTally(range(6), sparse=sparse)
+            tally.add_votes(votes)
+            supports.append(kemeny.support_matrix(PairwiseGraph(tally)))
+        dense, sparse = supports
+
+        assert kemeny.exact_ranking(sparse) == kemeny.exact_ranking(dense)
+        for order in itertools.islice(itertools.permutations(range(6)), 0, 720, 37):
+            assert kemeny.agreement(sparse, order) == kemeny.agreement(dense, order)
+        local_search = kemeny.local_search_ranking(sparse, time_limit=0.01)
+        assert kemeny.agreement(sparse, local_search) <= kemeny.agreement(
+            dense, kemeny.exact_ranking(dense)
+        )
+
+    n = SPARSE_MIN_CANDIDATES + 52
+    ballots = PairwiseBallotBox([[i, i + 1, "win"] for i in range(n - 1)])
+    assert ballots.tally.sparse
+    ranking, peak = _traced(Election(ballots).ranking_by_kemeny, time_limit=0.1)
+    assert ranking == list(range(n))
+    assert peak < n * n
+
+
+def test_get_instant_runoff():
+    ballots = RankedChoiceBallotBox(
+        [["a", "b", "c"]] * 4 + [["b", "c", "a"]] * 3 + [["c", "b", "a"]] * 2
+    )
+    election = Election(ballots)
+    assert election.ranking_by_instant_runoff() == ["b", "a", "c"]
+    assert election.ranking_by_instant_runoff(include_score=True) == [
+        ("b", 9.0),
+        ("a", 4.0),
+        ("c", 2.0),
+    ]
+
+
+def test_instant_runoff_splits_tied_preferences():
+    ballots = RankedChoiceBallotBox([[{1, 2}, 3], [{1, 2}, 3], [3, 1, 2]])
+    # Every candidate starts with one vote, so the last candidate seen is eliminated first
+    assert Election(ballots).ranking_by_instant_runoff(include_score=True) == [
+        (1, 3.0),
+        (2, 1.0),
+        (3, 1.0),
+    ]
+
+
+def test_get_single_transferable_vote():
+    ballots = RankedChoiceBallotBox(
+        [["a", "b", "c"]] * 4 + [["b", "c", "a"]] * 3 + [["c", "b", "a"]] * 2
+    )
+    election = Election(ballots)
+    assert election.ranking_by_single_transferable_vote(seats=2, include_score=True) == [
+        ("a", 4.0),
+        ("b", 5.0),
+    ]
+    assert election.ranking_by_single_transferable_vote() == ["b"]
+
+
+def test_runoff_methods_need_orderings():
+    with pytest.raises(ValueError):
+        Election(example_votes).ranking_by_instant_runoff()
+
+
 def test_get_win_tie_ratio():
     assert empty_election.ranking_by_win_tie_ratio() == []
 
@@ -63,3 +299,62 @@ def test_borda_count_ranked_choice_with_ties():
     election = Election(ballots)
     # assert election.ranking_by_borda_count() == [1, 2, 3]
     assert election.ranking_by_borda_count(include_score=True) == [(1, 4), (2, 1), (3, 0)]
+
+
+def test_borda_count_does_not_modify_orderings():
+    ballots = RankedChoiceBallotBox([[{1, 2}, 3], [1, 2, 3]])
+    election = Election(ballots)
+
+    assert election.ranking_by_borda_count(include_score=True) == [(1, 3), (2, 2), (3, 0)]
+    assert election.ranking_by_borda_count(include_score=True) == [(1, 3), (2, 2), (3, 0)]
+    assert ballots.get_orderings() == [[{1, 2}, {3}], [{1}, {2}, {3}]]
+
+
+def test_positional_scoring_rules():
+    ballots = RankedChoiceBallotBox([[1, 2, 3]] * 3 + [[2, 3, 1]] * 2 + [[{1, 3}, 2]])
+    election = Election(ballots)
+
+    assert election.ranking_by_plurality(include_score=True) == [(1, 3.5), (2, 2.0), (3, 0.5)]
+    assert election.ranking_by_anti_plurality(include_score=True) == [(2, 5.0), (1, 4.0), (3, 3.0)]
+    dowdall = election.ranking_by_dowdall(include_score=True)
+    assert [candidate for candidate, _ in dowdall] == [1, 2, 3]
+    assert [score for _, score in dowdall] == pytest.approx([3 + 2 / 3 + 0.75, 3.5 + 1 / 3, 2.75])
+    assert election.ranking_by_positional_scores(points=[5, 1], include_score=True) == [
+        (1, 18.0),
+        (2, 13.0),
+        (3, 5.0),
+    ]
+    assert election.ranking_by_positional_scores(points=[1], ties="top", include_score=True) == [
+        (1, 4),
+        (2, 2),
+        (3, 1),
+    ]
+
+
+def test_positional_scoring_rejects_invalid_rules():
+    election = Election(RankedChoiceBallotBox([[1, 2]]))
+    with pytest.raises(ValueError):
+        election.ranking_by_positional_scores(points=[3, 2, 1])
+    with pytest.raises(ValueError):
+        election.ranking_by_positional_scores(points=[1, 0], ties="random")
+
+
+def test_rank_all():
+    e_1 = Election(example_votes)
+    rankings, timings = e_1.rank_all()
+    assert list(rankings) == list(PAIRWISE_METHODS)
+    assert set(timings) == {"pairwise_graph", *PAIRWISE_METHODS}
+    assert rankings["copeland"] == e_1.ranking_by_copeland(include_score=True)
+    assert rankings["ranked_pairs"] == e_1.ranking_by_ranked_pairs(include_score=True)
+
+    ballots = RankedChoiceBallotBox([[1, 2, 3]] * 3 + [[2, 3, 1]] * 2)
+    rankings, _ = Election(ballots).rank_all()
+    assert list(rankings) == list(PAIRWISE_METHODS + ORDERING_METHODS)
+    assert rankings["instant_runoff"] == [(1, 5.0), (2, 2.0), (3, 0.0)]
+
+    rankings, timings = Election(ballots).rank_all({"single_transferable_vote": {"seats": 2}})
+    assert rankings == {"single_transferable_vote": [(1, 3.0), (2, 3.0)]}
+    assert set(timings) == {"pairwise_graph", "single_transferable_vote"}
+
+    with pytest.raises(ValueError):
+        e_1.rank_all(["coin_flip"])
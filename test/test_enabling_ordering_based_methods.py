@@ -6,6 +6,7 @@ from socialchoice import (
     IntransitivityResolverFactory,
     IncompletenessResolverFactory,
 )
+from socialchoice.induction.vote_induction import is_deterministic
 
 
 @pytest.mark.slow
@@ -22,3 +23,39 @@ def test_simple_pairwise_ballot():
     ballots.enable_ordering_based_methods(break_random_link, add_random_edges)
 
     assert Election(ballots).ranking_by_borda_count() == [1, 3, 2, 4]
+
+
+def test_deterministic_resolvers_resolve_each_distinct_ballot_once():
+    ballots = PairwiseBallotBox([(1, 2, "win"), (2, 1, "win"), (3, 2, "win"), (1, 2, "win")] * 3)
+    break_weakest_link = IntransitivityResolverFactory(ballots).make_break_weakest_link()
+    add_all_at_end = IncompletenessResolverFactory(ballots).make_add_all_at_end()
+    assert is_deterministic(break_weakest_link) and is_deterministic(add_all_at_end)
+
+    resolved = []
+
+    def counting_resolver(vote_set):
+        resolved.append(vote_set)
+        return break_weakest_link(vote_set)
+
+    counting_resolver.deterministic = True
+    ballots.enable_ordering_based_methods(counting_resolver, add_all_at_end)
+
+    assert len(resolved) == 3
+    expected = [[{1}, {2}, {3}], [{2}, {1}, {3}], [{3}, {2}, {1}], [{1}, {2}, {3}]]
+    assert ballots.get_orderings() == expected * 3
+
+
+def test_random_resolvers_resolve_every_ballot():
+    ballots = PairwiseBallotBox([(1, 2, "win"), (2, 3, "win")] * 5)
+    break_random_link = IntransitivityResolverFactory(ballots).make_break_random_link()
+    add_random_edges = IncompletenessResolverFactory(ballots).make_add_random_edges()
+    assert not is_deterministic(break_random_link) and not is_deterministic(add_random_edges)
+
+    resolved = []
+
+    def counting_resolver(vote_set):
+        resolved.append(vote_set)
+        return break_random_link(vote_set)
+
+    ballots.enable_ordering_based_methods(counting_resolver, add_random_edges)
+    assert len(resolved) == 10
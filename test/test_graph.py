@@ -0,0 +1,47 @@
+import networkx as nx
+import pytest
+
+from socialchoice import PairwiseBallotBox
+
+votes = [(0, 1, "win"), (1, 0, "win"), (1, 0, "win"), (2, 0, "tie"), (1, 2, "loss"), (3, 4, "win")]
+
+
+@pytest.fixture
+def graph():
+    return PairwiseBallotBox(votes).get_pairwise_graph()
+
+
+def test_edges(graph):
+    assert sorted(zip(*map(list, graph.victory_edges()))) == [(1, 0), (2, 1), (3, 4)]
+    assert len(graph.matchup_edges()[0]) == 8
+    assert graph.margins([1, 0], [0, 1]).tolist() == [2 / 3, 1 / 3]
+
+
+def test_edge_margins(graph):
+    assert graph.edge_margins() == {
+        (0, 1): 1 / 3,
+        (1, 0): 2 / 3,
+        (0, 2): 0.0,
+        (2, 0): 0.0,
+        (1, 2): 0.0,
+        (2, 1): 1.0,
+        (3, 4): 1.0,
+        (4, 3): 0.0,
+    }
+
+
+def test_to_networkx_matches_graphs_of_ballot_box(graph):
+    ballots = PairwiseBallotBox(votes)
+    for victory, expected in (
+        (True, ballots.get_victory_graph()),
+        (False, ballots.get_matchup_graph()),
+    ):
+        g = graph.to_networkx(victory=victory)
+        assert not nx.is_frozen(g)
+        assert list(g.nodes) == list(expected.nodes)
+        assert list(g.edges(data=True)) == list(expected.edges(data=True))
+
+
+def test_is_read_only(graph):
+    with pytest.raises(ValueError):
+        graph.wins[0, 1] = 10
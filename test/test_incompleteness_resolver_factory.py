@@ -1,7 +1,13 @@
+import random
+from collections import Counter
+
 import pytest
 
 from socialchoice import PairwiseBallotBox, nx
-from socialchoice.induction.resolving_incompleteness import IncompletenessResolverFactory
+from socialchoice.induction.resolving_incompleteness import (
+    IncompletenessResolverFactory,
+    add_random_edges,
+)
 
 
 @pytest.fixture
@@ -54,3 +60,32 @@ def test_factory_producing_add_edges_by_win_ratio(factory, wg):
     assert len(wg.nodes) == 3
     assert len(wg.edges) == 3
     assert set(wg.edges) == {(3, 2), (2, 1), (3, 1)}
+
+
+def test_add_random_edges_extends_the_partial_ranking():
+    wg = nx.DiGraph([(1, 2), (4, 2)])
+    rankings = set()
+    for _ in range(200):
+        completed = add_random_edges(wg, {1, 2, 3, 4})
+        ranking = list(nx.topological_sort(completed))
+        assert len(completed.edges) == 6
+        assert ranking.index(1) < ranking.index(2) and ranking.index(4) < ranking.index(2)
+        rankings.add(tuple(ranking))
+
+    # 3 can go anywhere, and 1 and 4 either way around, before 2
+    assert len(rankings) == 8
+    assert list(wg.edges) == [(1, 2), (4, 2)]
+
+
+def test_add_random_edges_samples_a_random_topological_sort():
+    random.seed(0)
+    wg = nx.DiGraph([("a", "b")])
+    samples = 4000
+    counts = Counter(
+        tuple(nx.topological_sort(add_random_edges(wg, {"a", "b", "c"}))) for _ in range(samples)
+    )
+
+    # c is placed first half of the time, and after a otherwise
+    assert set(counts) == {("c", "a", "b"), ("a", "c", "b"), ("a", "b", "c")}
+    assert counts["c", "a", "b"] / samples == pytest.approx(0.5, abs=0.03)
+    assert counts["a", "c", "b"] / samples == pytest.approx(0.25, abs=0.03)
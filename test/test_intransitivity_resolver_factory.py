@@ -1,5 +1,13 @@
+import random
+
+import networkx as nx
+
 from socialchoice import PairwiseBallotBox
-from socialchoice.induction.resolving_intransitivity import IntransitivityResolverFactory
+from socialchoice.induction.resolving_intransitivity import (
+    IntransitivityResolverFactory,
+    _victory_graph,
+    break_weakest_link,
+)
 
 
 def test_factory_producing_break_random_link():
@@ -36,3 +44,22 @@ def test_factory_producing_add_edges_in_order():
 
     transitive = add_edges_in_order(votes.ballots)
     assert set(transitive.edges) == {(1, 2), (2, 3)}
+
+
+def test_break_weakest_link_removes_the_edges_find_cycle_would_find():
+    rng = random.Random(0)
+    votes = [
+        (i, j, rng.choice(["win", "loss", "tie"])) for i in range(12) for j in range(i + 1, 12)
+    ]
+    edge_to_win_ratio = PairwiseBallotBox(votes).get_pairwise_graph().edge_margins()
+
+    expected = _victory_graph(votes)
+    while True:
+        try:
+            cycle = nx.find_cycle(expected)
+        except nx.NetworkXNoCycle:
+            break
+        expected.remove_edge(*min(cycle, key=lambda e: edge_to_win_ratio[e]))
+
+    transitive = break_weakest_link(edge_to_win_ratio, votes)
+    assert list(transitive.edges) == list(expected.edges)
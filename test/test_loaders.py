@@ -0,0 +1,117 @@
+import gc
+
+import pytest
+
+from socialchoice import (
+    PairwiseBallotBox,
+    VoterTrackingPairwiseBallotBox,
+    RankedChoiceBallotBox,
+    InvalidBallotDataException,
+    load_pairwise_csv,
+    load_pairwise_jsonl,
+    load_ranked_csv,
+    load_ranked_jsonl,
+)
+
+
+def test_load_pairwise_csv(tmp_path):
+    path = tmp_path / "votes.csv"
+    path.write_text("first,second,result\na,b,win\nb,c,loss\n\nc,a,tie\n")
+    progress = []
+
+    ballots = load_pairwise_csv(
+        path, header=True, chunk_size=2, report=lambda *p: progress.append(p)
+    )
+    assert ballots.ballots == [("a", "b", "win"), ("b", "c", "loss"), ("c", "a", "tie")]
+    assert [rows for rows, _ in progress] == [2, 3]
+    assert all(rows_per_second > 0 for _, rows_per_second in progress)
+
+
+def test_load_pairwise_csv_with_voters(tmp_path):
+    path = tmp_path / "votes.csv"
+    path.write_text("a,b,win,v1\nb,c,loss,v2\n")
+
+    ballots = load_pairwise_csv(path, voters=True)
+    assert isinstance(ballots, VoterTrackingPairwiseBallotBox)
+    assert ballots.votes == [("a", "b", "win", "v1"), ("b", "c", "loss", "v2")]
+
+
+def test_load_pairwise_jsonl(tmp_path):
+    path = tmp_path / "votes.jsonl"
+    votes = [(1, 2, "win"), (2, 3, "tie"), (3, 1, "loss")]
+    path.write_text("\n".join(f'[{a}, {b}, "{r}"]' for a, b, r in votes) + "\n\n")
+
+    ballots = load_pairwise_jsonl(path, chunk_size=2)
+    assert ballots.ballots == votes
+    assert ballots.get_matchups() == PairwiseBallotBox(votes).get_matchups()
+
+
+def test_invalid_pairwise_rows(tmp_path):
+    path = tmp_path / "votes.csv"
+    path.write_text("a,b,win\na,b\n")
+    with pytest.raises(InvalidBallotDataException):
+        load_pairwise_csv(path)
+
+    path.write_text("a,b,win\na,b,draw\n")
+    with pytest.raises(InvalidBallotDataException):
+        load_pairwise_csv(path)
+
+    path.write_text("a,b,win\na,c,win\n")
+    with pytest.raises(InvalidBallotDataException):
+        load_pairwise_csv(path, candidates=["a", "b"])
+
+    path = tmp_path / "votes.jsonl"
+    path.write_text('["a", "b", "win"]\n["a", "b", \n')
+    with pytest.raises(InvalidBallotDataException, match="line 2"):
+        load_pairwise_jsonl(path)
+
+    path.write_text('["a", "b", "win"]\n\n"a"\n')
+    with pytest.raises(InvalidBallotDataException, match="line 3"):
+        load_pairwise_jsonl(path, chunk_size=2)
+
+
+def test_load_ranked_csv(tmp_path):
+    path = tmp_path / "ballots.csv"
+    path.write_text("a,b,c\nb|c,a\na,b,c\n")
+
+    ballots = load_ranked_csv(path, chunk_size=2)
+    expected = RankedChoiceBallotBox([["a", "b", "c"], [{"b", "c"}, "a"], ["a", "b", "c"]])
+    assert ballots.get_weighted_orderings() == expected.get_weighted_orderings()
+
+    path.write_text("a,b,c\na,b\n")
+    with pytest.raises(InvalidBallotDataException):
+        load_ranked_csv(path)
+
+
+def test_load_ranked_jsonl(tmp_path):
+    path = tmp_path / "ballots.jsonl"
+    path.write_text("[1, 2, 3]\n[[1, 2], 3]\n")
+
+    ballots = load_ranked_jsonl(path)
+    expected = RankedChoiceBallotBox([[1, 2, 3], [{1, 2}, 3]])
+    assert ballots.get_weighted_orderings() == expected.get_weighted_orderings()
+
+    path.write_text("")
+    with pytest.raises(InvalidBallotDataException):
+        load_ranked_jsonl(path)
+
+
+def test_loading_restores_the_garbage_collector(tmp_path):
+    path = tmp_path / "votes.csv"
+    path.write_text("a,b,win\n")
+    gc.disable()
+    try:
+        load_pairwise_csv(path)
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+    load_pairwise_csv(path)
+    assert gc.isenabled()
+
+
+def test_only_loaders_are_exported():
+    import socialchoice
+
+    assert not hasattr(socialchoice, "_gc_paused")
+    assert not hasattr(socialchoice, "_json_chunks")
+    assert not hasattr(socialchoice, "csv")
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from socialchoice import tally as tally_module
+from socialchoice.tally import PairwiseTally
+
+
+def test_interning_is_stable():
+    tally = PairwiseTally(["b", "a"])
+    assert tally.intern("a") == 1
+    assert tally.intern("c") == 2
+    assert tally.ids == ["b", "a", "c"]
+    assert len(tally) == 3
+
+
+def test_add_votes():
+    tally = PairwiseTally()
+    tally.add_votes([(0, 1, "win"), (1, 0, "win"), (0, 2, "loss"), (2, 1, "tie"), (0, 1, "win")])
+
+    assert tally.ids == [0, 1, 2]
+    assert np.array_equal(tally.wins, [[0, 2, 0], [1, 0, 0], [1, 0, 0]])
+    assert np.array_equal(tally.losses, tally.wins.T)
+    assert np.array_equal(tally.ties, [[0, 0, 0], [0, 0, 1], [0, 1, 0]])
+
+
+def test_add_votes_in_batches_matches_single_batch():
+    votes = [(0, 1, "win"), (1, 2, "loss"), (2, 3, "tie"), (3, 0, "win")] * 5
+    together = PairwiseTally()
+    together.add_votes(votes)
+
+    separately = PairwiseTally()
+    separately.add_votes(votes[:7])
+    separately.add_votes([])
+    separately.add_votes(votes[7:])
+
+    assert np.array_equal(together.wins, separately.wins)
+    assert np.array_equal(together.ties, separately.ties)
+
+
+def test_sparse_tally_matches_dense_tally():
+    votes = [(i % 13, (i * 5) % 17, ["win", "loss", "tie"][i % 3]) for i in range(500)]
+    votes = [vote for vote in votes if vote[0] != vote[1]]
+    dense, sparse = PairwiseTally(), PairwiseTally(sparse=True)
+    for tally in (dense, sparse):
+        tally.add_votes(votes[:200])
+        tally.add_votes(votes[200:])
+        tally.remove_votes(votes[:50])
+
+    assert sparse.sparse and not dense.sparse
+    assert np.array_equal(sparse.wins.toarray(), dense.wins)
+    assert np.array_equal(sparse.ties.toarray(), dense.ties)
+    with pytest.raises(ValueError):
+        sparse.remove_votes([(0, 1, "win")] * 1000)
+    assert np.array_equal(sparse.wins.toarray(), dense.wins)
+
+
+def test_sparse_matrices_are_not_changed_by_later_votes():
+    tally = PairwiseTally(["a", "b"], sparse=True)
+    tally.add_votes([("a", "b", "win")])
+    wins = tally.wins
+
+    tally.add_votes([("a", "b", "win"), ("c", "a", "tie")])
+    assert wins.shape == (2, 2) and wins[0, 1] == 1
+    assert tally.wins.shape == (3, 3) and tally.wins[0, 1] == 2
+
+
+def test_large_tallies_with_few_matchups_become_sparse(monkeypatch):
+    monkeypatch.setattr(tally_module, "SPARSE_MIN_CANDIDATES", 100)
+    few = PairwiseTally()
+    few.add_votes([(i, i + 1, "win") for i in range(200)])
+    assert few.sparse
+    assert few.results([0, 1], [1, 0])[0].tolist() == [1, 0]
+
+    many = PairwiseTally()
+    many.add_votes([(i, j, "win") for i in range(100) for j in range(i + 1, 100)])
+    assert not many.sparse
+
+
+def test_rankings_are_counted_in_blocks_of_candidates(monkeypatch):
+    rng = np.random.default_rng(0)
+    ranks = rng.integers(0, 4, size=(30, 10))
+    counts = rng.integers(1, 5, size=30)
+    dense = PairwiseTally(range(10))
+    dense.add_rankings(ranks, counts)
+
+    monkeypatch.setattr(tally_module, "RANKING_CHUNK_CELLS", 64)
+    sparse = PairwiseTally(range(10), sparse=True)
+    sparse.add_rankings(ranks, counts)
+    assert np.array_equal(sparse.wins.toarray(), dense.wins)
+    assert np.array_equal(sparse.ties.toarray(), dense.ties)
+    assert dense.wins[0, 1] == counts[ranks[:, 0] < ranks[:, 1]].sum()
+
+
+def test_rankings_of_many_candidates_stay_dense():
+    n = tally_module.SPARSE_MIN_CANDIDATES + 52
+    # The second ballot ranks the candidates in reverse, in tied pairs
+    ranks = np.stack([np.arange(n), (n - 1 - np.arange(n)) // 2])
+    tally = PairwiseTally(range(n))
+    tally.add_rankings(ranks, [2, 1])
+
+    assert not tally.sparse
+    first, second = ranks[:, :, None] < ranks[:, None, :]
+    assert np.array_equal(tally.wins, 2 * first + second)
+    results = tally.results([0, n - 2], [n - 1, n - 1])
+    assert [result.tolist() for result in results] == [[2, 2], [1, 0], [0, 1]]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from socialchoice.tally import PairwiseTally
+from socialchoice.vote_store import VoteStore
+
+
+@pytest.fixture
+def tally():
+    return PairwiseTally(["a", "b", "c"])
+
+
+def test_roundtrip(tally):
+    store = VoteStore(tally.ids, track_voters=True)
+    votes = [("a", "b", "win", "v1"), ("c", "a", "tie", "v2"), ("b", "c", "loss", "v1")]
+    store.append(*tally.encode(votes), store.encode_voters(v[3] for v in votes))
+    store.append(*tally.encode(votes[:1]), store.encode_voters(["v3"]))
+
+    assert store.decode() == votes + [("a", "b", "win", "v3")]
+    assert store.voter_ids == ["v1", "v2", "v3"]
+    assert [column.dtype for column in store.columns()] == [np.int32, np.int32, np.int8, np.int32]
+
+
+def test_retract_removes_latest_matching_vote(tally):
+    store = VoteStore(tally.ids)
+    votes = [("a", "b", "win"), ("a", "c", "tie"), ("b", "a", "loss"), ("c", "a", "tie")]
+    store.append(*tally.encode(votes))
+
+    store.retract(*tally.encode([("a", "b", "win"), ("a", "c", "tie")]))
+    assert len(store) == 2
+    assert store.decode() == [("a", "b", "win"), ("a", "c", "tie")]
+
+
+def test_retract_checks_voters(tally):
+    store = VoteStore(tally.ids, track_voters=True)
+    store.append(*tally.encode([("a", "b", "win")]), store.encode_voters(["v1"]))
+    store.encode_voters(["v2"])
+
+    with pytest.raises(ValueError):
+        store.retract(*tally.encode([("a", "b", "win")]), store.encode_voters(["v2"]))
+    assert len(store) == 1
+
+    store.retract(*tally.encode([("b", "a", "loss")]), store.encode_voters(["v1"]))
+    assert store.decode() == []
+
+
+def test_retract_keeps_no_python_object_per_vote(tally):
+    store = VoteStore(tally.ids, track_voters=True)
+    votes = [("a", "b", "win"), ("b", "c", "tie"), ("c", "a", "loss")] * 1000
+    voters = store.encode_voters(str(i % 10) for i in range(len(votes)))
+    store.append(*tally.encode(votes), voters)
+    store.retract(*tally.encode(votes[:3]), voters[:3])
+    store.append(*tally.encode(votes[:3]), voters[:3])
+
+    def python_objects(value):
+        if isinstance(value, np.ndarray):
+            return 0
+        if isinstance(value, dict):
+            return 1 + sum(map(python_objects, value.items()))
+        if isinstance(value, (tuple, list)):
+            return 1 + sum(map(python_objects, value))
+        return 1
+
+    # The lookup tables hold one object per candidate and per voter, rather than per vote
+    tables = ("candidate_ids", "voter_ids", "voter_index")
+    state = [value for name, value in vars(store).items() if name not in tables]
+    assert python_objects(state) < 20
+    assert len(store) == len(votes)
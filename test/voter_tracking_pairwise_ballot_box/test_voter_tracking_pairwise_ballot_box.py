@@ -105,3 +105,34 @@ def test_throws_error_on_wrong_ballot_length():
         PairwiseBallotBox([("a", "b", "foo")])
 
     PairwiseBallotBox([("a", "b", "win"), ("a", "b", "loss"), ("a", "b", "tie")])
+
+
+def test_add_and_remove_votes():
+    ballots = VoterTrackingPairwiseBallotBox([[0, 1, "win", "voter1"], [3, 2, "loss", "voter1"]])
+    ballots.add_votes([[2, 3, "win", "voter1"], [0, 3, "tie", "voter1"], [3, 0, "win", "voter1"]])
+    assert ballots.get_matchups() == example_votes.get_matchups()
+
+    ballots.add_votes([[0, 1, "loss", "voter2"]])
+    ballots.remove_votes([[1, 0, "win", "voter2"]])
+    assert ballots.get_matchups() == example_votes.get_matchups()
+    assert ballots.votes == example_votes.votes
+
+
+def test_remove_votes_checks_voter():
+    ballots = VoterTrackingPairwiseBallotBox([[0, 1, "win", "voter1"]])
+
+    with pytest.raises(InvalidBallotDataException):
+        ballots.remove_votes([[0, 1, "win", "voter2"]])
+
+    assert ballots.get_matchups()[0][1] == {"wins": 1, "losses": 0, "ties": 0}
+
+
+def test_streaming_construction():
+    streamed = VoterTrackingPairwiseBallotBox(iter(example_votes.votes), chunk_size=2)
+    assert streamed.get_matchups() == example_votes.get_matchups()
+    assert streamed.votes == example_votes.votes
+
+    tally_only = VoterTrackingPairwiseBallotBox(iter(example_votes.votes), keep_votes=False)
+    assert tally_only.get_matchups() == example_votes.get_matchups()
+    with pytest.raises(ValueError):
+        tally_only.votes
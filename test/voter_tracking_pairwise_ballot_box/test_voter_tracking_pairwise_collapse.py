@@ -1,3 +1,5 @@
+import itertools
+
 from socialchoice import (
     VoterTrackingPairwiseBallotBox,
     IntransitivityResolverFactory,
@@ -46,3 +48,26 @@ def test_pairwise_collapse_different_voters():
         orderings.add(tuple(Election(ballots_v1).ranking_by_borda_count()))
 
     assert len(orderings) < 12
+
+
+def test_pairwise_collapse_in_worker_processes_keeps_voter_order():
+    # Each voter ranks all three candidates, so each voter's ordering is known exactly
+    rankings = [list(p) for p in itertools.permutations([1, 2, 3])] * 4
+    votes = [
+        [first, second, "win", f"voter{voter}"]
+        for voter, ranking in enumerate(rankings)
+        for first, second in itertools.combinations(ranking, 2)
+    ]
+    expected = [[{c} for c in ranking] for ranking in rankings]
+
+    ballots = VoterTrackingPairwiseBallotBox(votes)
+    intransitivity_res = IntransitivityResolverFactory(ballots).make_break_weakest_link()
+    incompleteness_res = IncompletenessResolverFactory(ballots).make_add_edges_by_win_ratio()
+
+    ballots.enable_ordering_based_methods(intransitivity_res, incompleteness_res)
+    assert ballots.get_orderings() == expected
+
+    ballots.enable_ordering_based_methods(
+        intransitivity_res, incompleteness_res, workers=2, chunk_size=5
+    )
+    assert ballots.get_orderings() == expected